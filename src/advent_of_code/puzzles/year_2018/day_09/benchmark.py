@@ -0,0 +1,58 @@
+import dataclasses
+import time
+import tracemalloc
+
+from advent_of_code.puzzles.year_2018.day_09 import process
+from advent_of_code.puzzles.year_2018.day_09 import process_linked_array
+from advent_of_code.puzzles.year_2018.day_09 import process_refactored
+
+
+ENGINES = {
+    'process': process.MarbleGame,
+    'process_refactored': process_refactored.MarbleGame,
+    'process_linked_array': process_linked_array.MarbleGame,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+    engine: str
+    score: int
+    seconds: float
+    peak_bytes: int
+
+
+def benchmark(engine, string, marble_multiplier=1):
+    marble_game_cls = ENGINES[engine]
+
+    # timed without tracemalloc, which would otherwise slow down every allocation
+    start = time.perf_counter()
+    score = marble_game_cls.from_string(string, marble_multiplier).play()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        marble_game_cls.from_string(string, marble_multiplier).play()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(engine, score, seconds, peak_bytes)
+
+
+def main():
+    with open('input.txt') as f:
+        string = f.read().rstrip()
+    for marble_multiplier in (1, 100):
+        print(f'Last marble multiplier: {marble_multiplier}')
+        for engine in ENGINES:
+            result = benchmark(engine, string, marble_multiplier)
+            print(
+                f'{result.engine:>22}: score {result.score}, '
+                f'{result.seconds:.3f} seconds, '
+                f'peak memory {result.peak_bytes / 1024 ** 2:.1f} MiB'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import array
+import re
+import timeit
+
+
+class MarbleGame:
+
+    def __init__(self, elves, last_marble):
+        # next_marble[m] and previous_marble[m] link marble m to its clockwise and counter-clockwise neighbours
+        self.next_marble = array.array('I', [0]) * (last_marble + 1)
+        self.previous_marble = array.array('I', [0]) * (last_marble + 1)
+        self.scores = [0] * elves
+        self.last_marble = last_marble
+
+    @classmethod
+    def from_string(cls, string, marble_multiplier=1):
+        if match := re.fullmatch(r'(?P<elves>\d+) players; last marble is worth (?P<last_marble>\d+) points', string):
+            return cls(int(match.group('elves')), int(match.group('last_marble')) * marble_multiplier)
+        else:
+            raise Exception
+
+    @classmethod
+    def read_file(cls, marble_multiplier=1):
+        with open('input.txt') as f:
+            return cls.from_string(f.read().rstrip(), marble_multiplier)
+
+    def play(self):
+        next_marble = self.next_marble
+        previous_marble = self.previous_marble
+        scores = self.scores
+        elves = len(scores)
+        current_marble = 0
+        for marble in range(1, self.last_marble + 1):
+            if marble % 23 == 0:
+                for _ in range(7):
+                    current_marble = previous_marble[current_marble]
+
+                one_counter_clockwise = previous_marble[current_marble]
+                one_clockwise = next_marble[current_marble]
+
+                next_marble[one_counter_clockwise] = one_clockwise
+                previous_marble[one_clockwise] = one_counter_clockwise
+
+                scores[(marble - 1) % elves] += marble + current_marble
+
+                current_marble = one_clockwise
+            else:
+                one_clockwise = next_marble[current_marble]
+                two_clockwise = next_marble[one_clockwise]
+
+                next_marble[one_clockwise] = marble
+                previous_marble[marble] = one_clockwise
+                next_marble[marble] = two_clockwise
+                previous_marble[two_clockwise] = marble
+
+                current_marble = marble
+        return max(scores)
+
+
+def main():
+    marble_game = MarbleGame.read_file()
+    print(f"Winning elf's score: {marble_game.play()}")
+
+    marble_game_2 = MarbleGame.read_file(marble_multiplier=100)
+    print(f"Winning elf's score with last marble 100 times larger: {marble_game_2.play()}")
+
+
+if __name__ == '__main__':
+    print(f'Completed in {timeit.timeit(main, number=1)} seconds')
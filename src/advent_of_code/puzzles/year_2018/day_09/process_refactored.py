@@ -6,6 +6,9 @@ import timeit
 import typing
 
 
+BLOCK_MODE_MIN_LAST_MARBLE = 100_000
+
+
 @dataclasses.dataclass
 class Marble:
     previous: int
@@ -37,7 +40,11 @@ class MarbleGame:
         with open('input.txt') as f:
             return cls.from_string(f.read().rstrip(), marble_multiplier)
 
-    def play(self):
+    def play(self, block_mode=None):
+        if block_mode is None:
+            block_mode = self.last_marble >= BLOCK_MODE_MIN_LAST_MARBLE
+        if block_mode:
+            return self._play_blocks()
         for marble, elf in enumerate(itertools.cycle(self.elves)):
             if marble and (marble % 23 == 0):
                 self.circle.rotate(7)
@@ -49,6 +56,68 @@ class MarbleGame:
             if marble == self.last_marble:
                 return max(self.elves, key=lambda elf_: elf_.score).score
 
+    def _play_blocks(self):
+        """
+        Play the game in blocks of 23 marbles without rotating the circle once per marble.
+
+        With the current marble kept at the right end of the circle, each of the 22 ordinary marbles in a block
+        carries the leftmost marble round to the right end and lands after it. The scoring marble then removes the
+        19th marble carried round and leaves the last three, interleaved with the last three marbles placed, at the
+        left end. A block therefore reads 16 marbles from the left of the circle and appends 37 to the right, so
+        every block that only reads marbles already in the circle can be placed together using strided slices.
+        """
+        first_block_marble = min(self.last_marble, 23)
+        for marble in range(first_block_marble + 1):
+            if marble and (marble % 23 == 0):
+                self.circle.rotate(7)
+                self.elves[marble % len(self.elves)].score += (self.circle.pop() + marble)
+                self.circle.rotate(-1)
+            else:
+                self.circle.rotate(-1)
+                self.circle.append(marble)
+
+        circle = list(self.circle)
+        front, unread = circle[:6], circle[6:]
+        block_start = first_block_marble
+        # marbles after the final scoring marble cannot change any score
+        blocks_left = (self.last_marble - block_start) // 23
+        while blocks_left:
+            blocks = min(blocks_left, len(unread) // 16)
+            block_end = block_start + 23 * blocks
+            read_end = 16 * blocks
+
+            scoring_marbles = range(block_start + 23, block_end + 1, 23)
+            for scoring_marble, removed_marble in zip(scoring_marbles, unread[12:read_end:16]):
+                self.elves[scoring_marble % len(self.elves)].score += (removed_marble + scoring_marble)
+
+            placed = [0] * (37 * blocks)
+            for front_idx in range(6):
+                if front_idx % 2 == 0:
+                    carried_front = unread[13 + front_idx // 2:read_end - 16:16]
+                else:
+                    carried_front = range(block_start + 20 + front_idx // 2, block_end - 23, 23)
+                placed[2 * front_idx::37] = [front[front_idx], *carried_front]
+            for unread_idx in range(12):
+                placed[12 + 2 * unread_idx::37] = unread[unread_idx:read_end:16]
+            for marble_idx in range(18):
+                placed[2 * marble_idx + 1::37] = range(block_start + marble_idx + 1, block_end, 23)
+            placed[36::37] = range(block_start + 19, block_end, 23)
+
+            last_block_start = block_end - 23
+            front = [
+                unread[read_end - 3], last_block_start + 20,
+                unread[read_end - 2], last_block_start + 21,
+                unread[read_end - 1], last_block_start + 22,
+            ]
+            del unread[:read_end]
+            unread += placed
+
+            block_start = block_end
+            blocks_left -= blocks
+
+        self.circle = collections.deque(front + unread)
+        return max(self.elves, key=lambda elf_: elf_.score).score
+
 
 def main():
     marble_game = MarbleGame.read_file()
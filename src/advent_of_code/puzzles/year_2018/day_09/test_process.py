@@ -1,4 +1,9 @@
+import pytest
+
 from advent_of_code.puzzles.year_2018.day_09 import process
+from advent_of_code.puzzles.year_2018.day_09 import process_linked_array
+from advent_of_code.puzzles.year_2018.day_09 import process_refactored
+from advent_of_code.puzzles.year_2018.day_09 import tournament
 
 
 def test_example_1():
@@ -29,3 +34,69 @@ def test_example_5():
 def test_example_6():
     marble_game = process.MarbleGame.from_string('30 players; last marble is worth 5807 points')
     assert marble_game.play() == 37305
+
+
+@pytest.mark.parametrize('string, score', [
+    ('9 players; last marble is worth 25 points', 32),
+    ('10 players; last marble is worth 1618 points', 8317),
+    ('13 players; last marble is worth 7999 points', 146373),
+    ('17 players; last marble is worth 1104 points', 2764),
+    ('21 players; last marble is worth 6111 points', 54718),
+    ('30 players; last marble is worth 5807 points', 37305),
+])
+def test_linked_array_engine(string, score):
+    marble_game = process_linked_array.MarbleGame.from_string(string)
+    assert marble_game.play() == score
+
+
+@pytest.mark.parametrize('elves, last_marble', [(1, 23), (2, 46), (5, 100), (9, 1000), (431, 7095)])
+def test_engines_agree(elves, last_marble):
+    expected = process.MarbleGame(elves, last_marble).play()
+    assert process_refactored.MarbleGame(elves, last_marble).play() == expected
+    assert process_linked_array.MarbleGame(elves, last_marble).play() == expected
+
+
+@pytest.mark.parametrize('elves', [1, 2, 9, 10, 13, 23, 30, 431])
+@pytest.mark.parametrize('last_marble', [0, 1, 22, 23, 24, 45, 46, 47, 69, 1104, 1618, 5807, 6111, 7999, 25000])
+def test_block_mode_agrees_with_other_engines(elves, last_marble):
+    expected = process_linked_array.MarbleGame(elves, last_marble).play()
+    assert process_refactored.MarbleGame(elves, last_marble).play(block_mode=True) == expected
+    assert process_refactored.MarbleGame(elves, last_marble).play(block_mode=False) == expected
+    if last_marble:
+        assert process.MarbleGame(elves, last_marble).play() == expected
+
+
+def test_block_mode_is_chosen_for_large_games():
+    marble_game = process_refactored.MarbleGame.from_string(
+        '10 players; last marble is worth 1618 points', marble_multiplier=100
+    )
+    assert marble_game.last_marble >= process_refactored.BLOCK_MODE_MIN_LAST_MARBLE
+    assert marble_game.play() == process_linked_array.MarbleGame(10, 161800).play()
+
+
+@pytest.mark.parametrize('last_marble', [23, 46, 23 * 50, 23 * 1000])
+def test_block_mode_leaves_same_circle_after_scoring_marble(last_marble):
+    marble_game = process_refactored.MarbleGame(elves=9, last_marble=last_marble)
+    marble_game_blocks = process_refactored.MarbleGame(elves=9, last_marble=last_marble)
+    marble_game.play(block_mode=False)
+    marble_game_blocks.play(block_mode=True)
+    assert marble_game_blocks.circle == marble_game.circle
+
+
+def test_tournament_streams_every_game_result():
+    specs = [
+        '10 players; last marble is worth 1618 points',
+        '13 players; last marble is worth 7999 points',
+        '17 players; last marble is worth 1104 points',
+        '21 players; last marble is worth 6111 points',
+        '30 players; last marble is worth 5807 points',
+    ]
+    results = list(tournament.run_tournament(specs, max_workers=2))
+    assert {result.spec: result.score for result in results} == {
+        '10 players; last marble is worth 1618 points': 8317,
+        '13 players; last marble is worth 7999 points': 146373,
+        '17 players; last marble is worth 1104 points': 2764,
+        '21 players; last marble is worth 6111 points': 54718,
+        '30 players; last marble is worth 5807 points': 37305,
+    }
+    assert all(result.elapsed >= 0 for result in results)
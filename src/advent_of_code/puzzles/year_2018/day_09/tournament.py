@@ -0,0 +1,60 @@
+import argparse
+import concurrent.futures
+import dataclasses
+import os
+import time
+
+from advent_of_code.puzzles.year_2018.day_09 import process_refactored
+
+
+@dataclasses.dataclass(frozen=True)
+class GameResult:
+    spec: str
+    score: int
+    elapsed: float
+
+
+def play_game(spec, marble_multiplier=1):
+    start = time.perf_counter()
+    score = process_refactored.MarbleGame.from_string(spec, marble_multiplier).play()
+    return GameResult(spec, score, time.perf_counter() - start)
+
+
+def run_tournament(specs, marble_multiplier=1, max_workers=None):
+    """
+    Play every game spec on a process pool, yielding a GameResult for each game as it finishes.
+
+    Games are submitted longest first, using the last marble as the cost estimate, so that the biggest games are not
+    left running on their own at the end.
+    """
+    specs = sorted(
+        specs,
+        key=lambda spec: process_refactored.MarbleGame.from_string(spec, marble_multiplier).last_marble,
+        reverse=True,
+    )
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(play_game, spec, marble_multiplier) for spec in specs]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def read_specs(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play a batch of marble games across a process pool.')
+    parser.add_argument('path', help='file with one "N players; last marble is worth M points" spec per line')
+    parser.add_argument('--marble-multiplier', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of cores')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for result in run_tournament(read_specs(args.path), args.marble_multiplier, args.workers):
+        print(f'{result.spec}: winning score {result.score} ({result.elapsed:.3f} seconds)', flush=True)
+    print(f'Completed in {time.perf_counter() - start} seconds')
+
+
+if __name__ == '__main__':
+    main()
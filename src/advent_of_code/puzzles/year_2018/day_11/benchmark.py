@@ -0,0 +1,54 @@
+import dataclasses
+import time
+import tracemalloc
+
+from advent_of_code.puzzles.year_2018.day_11 import process
+from advent_of_code.puzzles.year_2018.day_11 import process_numpy
+
+
+ENGINES = {
+    'process': process.ChronalCharge,
+    'process_numpy': process_numpy.ChronalCharge,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+    engine: str
+    largest_power: process.Matrix
+    seconds: float
+    peak_bytes: int
+
+
+def benchmark(engine, serial_no):
+    chronal_charge_cls = ENGINES[engine]
+
+    # timed without tracemalloc, which would otherwise slow down every allocation
+    start = time.perf_counter()
+    largest_power = chronal_charge_cls(serial_no).largest_power_all_k()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        chronal_charge_cls(serial_no).largest_power_all_k()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(engine, largest_power, seconds, peak_bytes)
+
+
+def main():
+    with open('input.txt') as f:
+        serial_no = int(f.read().rstrip())
+    for engine in ENGINES:
+        result = benchmark(engine, serial_no)
+        print(
+            f'{result.engine:>13}: {result.largest_power}, '
+            f'{result.seconds:.3f} seconds, '
+            f'peak memory {result.peak_bytes / 1024 ** 2:.1f} MiB'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
+import array
 import dataclasses
+import functools
 import itertools
 import timeit
 import typing
@@ -6,6 +8,9 @@ import typing
 import more_itertools
 
 
+MAX_POWER_LEVEL = 4
+
+
 @dataclasses.dataclass(frozen=True)
 class Coords:
     x: int
@@ -25,20 +30,21 @@ class FuelCells:
     def __init__(self, serial_no):
         self._serial_no = serial_no
         self.size = 300
-        self.map = {}
-        for x, y in itertools.product(range(1, self.size + 1), range(1, self.size + 1)):
-            power_level = self.calculate_power_level(serial_no, x, y)
-            self.map[Coords(x, y)] = power_level
-        self.grid = []
-        for row_no in range(1, self.size+1):
-            row = []
-            for col_no in range(1, self.size+1):
-                row.append(self.map[Coords(col_no, row_no)])
-            self.grid.append(row)
+        rack_ids = range(11, self.size + 11)
+        self.grid = [
+            array.array('b', [abs((rack_id * y + serial_no) * rack_id) // 100 % 10 - 5 for rack_id in rack_ids])
+            for y in range(1, self.size + 1)
+        ]
         self.nrows = len(self.grid)
         self.ncols = len(self.grid[0])
 
-
+    @functools.cached_property
+    def map(self):
+        # only built for callers that still want power levels keyed by Coords
+        return {
+            Coords(x, y): self.grid[y - 1][x - 1]
+            for x, y in itertools.product(range(1, self.size + 1), range(1, self.size + 1))
+        }
 
     @staticmethod
     def calculate_power_level(serial_no, x, y):
@@ -46,8 +52,8 @@ class FuelCells:
         power_level = rack_id * y
         power_level += serial_no
         power_level *= rack_id
-        hundreds_digit = str(power_level).zfill(3)[-3]
-        power_level = int(hundreds_digit) - 5
+        hundreds_digit = abs(power_level) // 100 % 10
+        power_level = hundreds_digit - 5
         return power_level
 
 
@@ -55,6 +61,7 @@ class ChronalCharge:
 
     def __init__(self, serial_no):
         self.fuel_cells = FuelCells(serial_no)
+        self.positions_evaluated = 0
 
     @classmethod
     def read_file(cls):
@@ -66,13 +73,14 @@ class ChronalCharge:
         for square_split_coords in itertools.product(more_itertools.windowed(range(1, 300), 3), more_itertools.windowed(range(1, 300), 3)):
             square_coords = itertools.product(*square_split_coords)
             (top_left,), square_coords = more_itertools.spy(square_coords)
-            power = sum(self.fuel_cells.map[Coords(x, y)] for x, y in square_coords)
+            power = sum(self.fuel_cells.grid[y - 1][x - 1] for x, y in square_coords)
             powers[Coords(*top_left)] = power
         largest_power = max(powers, key=lambda coords: powers[coords])
         return largest_power.x, largest_power.y
 
     def _largest_power(self, k, summed_grid):
         largest_power = None
+        self.positions_evaluated += (self.fuel_cells.nrows - k + 1) * (self.fuel_cells.ncols - k + 1)
         for bottom_right_row_no in range(k - 1, self.fuel_cells.nrows):
             for bottom_right_col_no in range(k - 1, self.fuel_cells.ncols):
 
@@ -107,7 +115,7 @@ class ChronalCharge:
                     )
         return largest_power
 
-    def largest_power(self, start_k, end_k=None):
+    def largest_power(self, start_k, end_k=None, prune=False):
 
         summed_grid: list[list[typing.Optional[int]]] = [[None for _ in range(self.fuel_cells.nrows)] for _ in range(self.fuel_cells.ncols)]
 
@@ -134,9 +142,12 @@ class ChronalCharge:
                 )
 
         largest_power = None
+        self.positions_evaluated = 0
 
         if end_k is None:
             largest_power = self._largest_power(start_k, summed_grid)
+        elif prune:
+            largest_power = self._pruned_largest_power(start_k, end_k, summed_grid)
         else:
             for k in range(start_k, end_k+1):
                 power = self._largest_power(k, summed_grid)
@@ -145,8 +156,32 @@ class ChronalCharge:
 
         return largest_power
 
-    def largest_power_all_k(self):
-        return self.largest_power(start_k=1, end_k=self.fuel_cells.ncols)
+    def _pruned_largest_power(self, start_k, end_k, summed_grid):
+        """
+        Search square sizes from smallest to largest, skipping every size whose upper bound cannot beat the best square.
+
+        A k by k square can be tiled with (k // j) ** 2 squares of size j, none of which can be worth more than the
+        largest (or the bound on the largest) j by j square, and the cells left over are each worth at most
+        MAX_POWER_LEVEL. Only the bounds are computed for skipped sizes, so no positions are scanned for them.
+        """
+        size_bounds = {}
+        largest_power = None
+        for k in range(start_k, end_k + 1):
+            bound = k * k * MAX_POWER_LEVEL
+            for j, j_bound in size_bounds.items():
+                tiles = (k // j) ** 2
+                bound = min(bound, tiles * j_bound + (k * k - tiles * j * j) * MAX_POWER_LEVEL)
+            if largest_power is not None and bound <= largest_power.val:
+                size_bounds[k] = bound
+                continue
+            power = self._largest_power(k, summed_grid)
+            size_bounds[k] = power.val
+            if largest_power is None or power.val > largest_power.val:
+                largest_power = power
+        return largest_power
+
+    def largest_power_all_k(self, prune=False):
+        return self.largest_power(start_k=1, end_k=self.fuel_cells.ncols, prune=prune)
 
 
 def main():
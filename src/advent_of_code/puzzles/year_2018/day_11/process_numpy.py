@@ -0,0 +1,293 @@
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import timeit
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from advent_of_code.puzzles.year_2018.day_11.process import Matrix
+
+
+GRID_SIZE = 300
+DEFAULT_CACHE_SIZE = 64
+DEFAULT_CHUNK_SIZE = 8
+
+
+def power_grids(serial_nos, size=GRID_SIZE):
+    # indexed [serial, y - 1, x - 1]
+    serial_nos = np.asarray(serial_nos, dtype=np.int64)[:, np.newaxis, np.newaxis]
+    x = np.arange(1, size + 1, dtype=np.int64)
+    y = np.arange(1, size + 1, dtype=np.int64)[:, np.newaxis]
+    rack_id = x + 10
+    power_level = (rack_id * y + serial_nos) * rack_id
+    return ((np.abs(power_level) // 100) % 10 - 5).astype(np.int8)
+
+
+def power_grid(serial_no, size=GRID_SIZE):
+    # indexed [y - 1, x - 1]
+    return power_grids([serial_no], size)[0]
+
+
+def summed_area_table(grid):
+    # padded with a leading row and column of zeros so that every square sum is four lookups without edge cases
+    summed_grid = np.zeros(grid.shape[:-2] + (grid.shape[-2] + 1, grid.shape[-1] + 1), dtype=np.int32)
+    summed_grid[..., 1:, 1:] = grid.cumsum(axis=-2, dtype=np.int32).cumsum(axis=-1)
+    return summed_grid
+
+
+def square_sums(summed_grid, k):
+    # indexed [..., top_left_y - 1, top_left_x - 1]
+    sums = summed_grid[..., k:, k:] - summed_grid[..., :-k, k:]
+    sums -= summed_grid[..., k:, :-k]
+    sums += summed_grid[..., :-k, :-k]
+    return sums
+
+
+def largest_square(summed_grid, k):
+    sums = square_sums(summed_grid, k)
+    # argmax returns the first maximum in row-major order, the same tie-break as a y-then-x scan
+    top_left_row_no, top_left_col_no = np.unravel_index(np.argmax(sums), sums.shape)
+    return Matrix(
+        top_left_x=int(top_left_col_no) + 1,
+        top_left_y=int(top_left_row_no) + 1,
+        size=k,
+        val=int(sums[top_left_row_no, top_left_col_no]),
+    )
+
+
+def largest_square_in_range(summed_grid, start_k, end_k):
+    largest_power = None
+    for k in range(start_k, end_k + 1):
+        power = largest_square(summed_grid, k)
+        if largest_power is None or power.val > largest_power.val:
+            largest_power = power
+    return largest_power
+
+
+def balanced_k_chunks(start_k, end_k, grid_size, chunks):
+    """
+    Split start_k..end_k into at most `chunks` contiguous (start_k, end_k) ranges with a similar number of positions.
+
+    A k by k square has (grid_size - k + 1) ** 2 top-left positions, so small sizes cost far more than large ones.
+    """
+    costs = {k: (grid_size - k + 1) ** 2 for k in range(start_k, end_k + 1)}
+    target = sum(costs.values()) / chunks
+    k_chunks = []
+    chunk_start_k = start_k
+    chunk_cost = 0
+    for k, cost in costs.items():
+        chunk_cost += cost
+        if chunk_cost >= target and len(k_chunks) < chunks - 1:
+            k_chunks.append((chunk_start_k, k))
+            chunk_start_k = k + 1
+            chunk_cost = 0
+    if chunk_start_k <= end_k:
+        k_chunks.append((chunk_start_k, end_k))
+    return k_chunks
+
+
+def _shared_largest_square_in_range(shm_name, shape, dtype, start_k, end_k):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return largest_square_in_range(np.ndarray(shape, dtype=dtype, buffer=shm.buf), start_k, end_k)
+    finally:
+        shm.close()
+
+
+def parallel_largest_square_in_range(summed_grid, start_k, end_k, workers=None):
+    """
+    Search start_k..end_k on a process pool that reads one copy of the summed-area table from shared memory.
+    """
+    workers = workers or os.cpu_count()
+    shm = shared_memory.SharedMemory(create=True, size=summed_grid.nbytes)
+    try:
+        shared_summed_grid = np.ndarray(summed_grid.shape, dtype=summed_grid.dtype, buffer=shm.buf)
+        shared_summed_grid[...] = summed_grid
+        del shared_summed_grid
+        k_chunks = balanced_k_chunks(start_k, end_k, summed_grid.shape[-1] - 1, workers)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(k_chunks))) as executor:
+            largest_powers = executor.map(
+                _shared_largest_square_in_range,
+                itertools.repeat(shm.name),
+                itertools.repeat(summed_grid.shape),
+                itertools.repeat(summed_grid.dtype.str),
+                *zip(*k_chunks),
+            )
+            largest_power = None
+            # chunks come back in k order, so a strict comparison keeps the smallest k on a tie
+            for power in largest_powers:
+                if largest_power is None or power.val > largest_power.val:
+                    largest_power = power
+        return largest_power
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+class ChronalCharge:
+
+    def __init__(self, serial_no):
+        self.grid = power_grid(serial_no)
+        self.summed_grid = summed_area_table(self.grid)
+
+    @classmethod
+    def read_file(cls):
+        with open('input.txt') as f:
+            return cls(int(f.read().rstrip()))
+
+    def largest_power_3_by_3(self):
+        largest_power = self.largest_power(3)
+        return largest_power.top_left_x, largest_power.top_left_y
+
+    def largest_power(self, start_k, end_k=None, workers=None):
+        if end_k is None:
+            return largest_square(self.summed_grid, start_k)
+        if workers is not None and workers > 1:
+            return parallel_largest_square_in_range(self.summed_grid, start_k, end_k, workers)
+        return largest_square_in_range(self.summed_grid, start_k, end_k)
+
+    def largest_power_all_k(self, workers=None):
+        return self.largest_power(start_k=1, end_k=self.grid.shape[1], workers=workers)
+
+
+class SummedGridCache:
+    """
+    Size-bounded LRU cache of summed-area tables keyed by serial number, and of the largest powers found in them keyed
+    by (serial number, start k, end k).
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.maxsize = maxsize
+        self.chunk_size = chunk_size
+        self._summed_grids = collections.OrderedDict()
+        self._largest_powers = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._summed_grids)
+
+    def __contains__(self, serial_no):
+        return serial_no in self._summed_grids
+
+    def get(self, serial_nos):
+        """
+        Return the summed-area tables for the given serial numbers stacked into one [serial, y, x] array.
+
+        Serial numbers not already cached have their power grids computed together, chunk_size serials at a time.
+        """
+        summed_grids = {}
+        missing = []
+        for serial_no in dict.fromkeys(serial_nos):
+            if serial_no in self._summed_grids:
+                self._summed_grids.move_to_end(serial_no)
+                summed_grids[serial_no] = self._summed_grids[serial_no]
+            else:
+                missing.append(serial_no)
+        for chunk_start in range(0, len(missing), self.chunk_size):
+            chunk = missing[chunk_start:chunk_start + self.chunk_size]
+            for serial_no, summed_grid in zip(chunk, summed_area_table(power_grids(chunk))):
+                summed_grids[serial_no] = summed_grid
+                self._put(self._summed_grids, serial_no, summed_grid)
+        return np.stack([summed_grids[serial_no] for serial_no in serial_nos])
+
+    def get_largest_power(self, serial_no, start_k, end_k):
+        """
+        Return the cached largest power for a serial number over start_k..end_k, or None if it has not been found.
+        """
+        key = serial_no, start_k, end_k
+        if key not in self._largest_powers:
+            return None
+        self._largest_powers.move_to_end(key)
+        return self._largest_powers[key]
+
+    def put_largest_power(self, serial_no, start_k, end_k, largest_power):
+        self._put(self._largest_powers, (serial_no, start_k, end_k), largest_power)
+
+    def _put(self, entries, key, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+
+class ChronalChargeBatch:
+
+    def __init__(self, serial_nos, cache=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.serial_nos = list(dict.fromkeys(serial_nos))
+        self.cache = SummedGridCache(chunk_size=chunk_size) if cache is None else cache
+        self.chunk_size = chunk_size
+
+    def largest_power_3_by_3(self):
+        return {
+            serial_no: (largest_power.top_left_x, largest_power.top_left_y)
+            for serial_no, largest_power in self.largest_power(3).items()
+        }
+
+    def largest_power(self, start_k, end_k=None):
+        end_k = start_k if end_k is None else end_k
+        largest_powers = {}
+        missing = []
+        for serial_no in self.serial_nos:
+            largest_power = self.cache.get_largest_power(serial_no, start_k, end_k)
+            if largest_power is None:
+                missing.append(serial_no)
+            else:
+                largest_powers[serial_no] = largest_power
+        for chunk_start in range(0, len(missing), self.chunk_size):
+            chunk = missing[chunk_start:chunk_start + self.chunk_size]
+            for serial_no, largest_power in zip(chunk, self._largest_powers(self.cache.get(chunk), start_k, end_k)):
+                largest_powers[serial_no] = largest_power
+                self.cache.put_largest_power(serial_no, start_k, end_k, largest_power)
+        return {serial_no: largest_powers[serial_no] for serial_no in self.serial_nos}
+
+    def largest_power_all_k(self):
+        return self.largest_power(start_k=1, end_k=GRID_SIZE)
+
+    @staticmethod
+    def _largest_powers(summed_grids, start_k, end_k):
+        serials = np.arange(len(summed_grids))
+        best_vals = np.full(len(summed_grids), np.iinfo(np.int32).min, dtype=np.int64)
+        best_idxs = np.zeros(len(summed_grids), dtype=np.int64)
+        best_ks = np.zeros(len(summed_grids), dtype=np.int64)
+        for k in range(start_k, end_k + 1):
+            sums = square_sums(summed_grids, k).reshape(len(summed_grids), -1)
+            idxs = sums.argmax(axis=1)
+            vals = sums[serials, idxs]
+            # strictly greater, so the smallest k keeps a tie as in ChronalCharge.largest_power
+            better = vals > best_vals
+            best_vals[better] = vals[better]
+            best_idxs[better] = idxs[better]
+            best_ks[better] = k
+        largest_powers = []
+        for val, idx, k in zip(best_vals, best_idxs, best_ks):
+            top_left_row_no, top_left_col_no = divmod(int(idx), summed_grids.shape[-1] - k)
+            largest_powers.append(Matrix(
+                top_left_x=top_left_col_no + 1,
+                top_left_y=top_left_row_no + 1,
+                size=int(k),
+                val=int(val),
+            ))
+        return largest_powers
+
+
+def main(workers=None):
+    chronal_charge = ChronalCharge.read_file()
+    print('Largest power for 3x3 square:', chronal_charge.largest_power_3_by_3())
+    largest_power_for_any_square = chronal_charge.largest_power_all_k(workers=workers)
+    print(
+        'Largest power for any square:',
+        ','.join(str(val) for val in [
+            largest_power_for_any_square.top_left_x,
+            largest_power_for_any_square.top_left_y,
+            largest_power_for_any_square.size
+        ])
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=None, help='search square sizes on this many processes')
+    args = parser.parse_args()
+    print(f'Completed in {timeit.timeit(lambda: main(args.workers), number=1)} seconds')
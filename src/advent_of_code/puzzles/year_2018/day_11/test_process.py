@@ -1,4 +1,7 @@
+import pytest
+
 from advent_of_code.puzzles.year_2018.day_11 import process
+from advent_of_code.puzzles.year_2018.day_11 import process_numpy
 
 
 def test_example_1():
@@ -17,6 +20,16 @@ def test_example_4():
     assert process.FuelCells.calculate_power_level(serial_no=71, x=101, y=153) == 4
 
 
+def test_grid_matches_calculate_power_level():
+    fuel_cells = process.FuelCells(serial_no=18)
+    assert 'map' not in vars(fuel_cells)
+    for x, y in [(1, 1), (33, 45), (300, 1), (1, 300), (300, 300)]:
+        expected = process.FuelCells.calculate_power_level(serial_no=18, x=x, y=y)
+        assert fuel_cells.grid[y - 1][x - 1] == expected
+        assert fuel_cells.map[process.Coords(x, y)] == expected
+    assert len(fuel_cells.map) == 300 * 300
+
+
 def test_example_5():
     chronal_charge = process.ChronalCharge(serial_no=18)
     assert chronal_charge.largest_power_3_by_3() == (33, 45)
@@ -49,3 +62,100 @@ def test_example_8():
     chronal_charge = process.ChronalCharge(serial_no=42)
     result = chronal_charge.largest_power_all_k()
     assert (result.top_left_x, result.top_left_y, result.size) == (232, 251, 12)
+
+
+@pytest.mark.parametrize('serial_no', [18, 42])
+def test_pruned_search_matches_exhaustive_search(serial_no):
+    chronal_charge = process.ChronalCharge(serial_no)
+    exhaustive = chronal_charge.largest_power_all_k()
+    exhaustive_positions = chronal_charge.positions_evaluated
+    pruned = chronal_charge.largest_power_all_k(prune=True)
+    assert pruned == exhaustive
+    assert chronal_charge.positions_evaluated < exhaustive_positions
+    assert exhaustive_positions == sum((300 - k + 1) ** 2 for k in range(1, 301))
+
+
+@pytest.mark.parametrize('serial_no, x, y, power_level', [(8, 3, 5, 4), (57, 122, 79, -5), (39, 217, 196, 0), (71, 101, 153, 4)])
+def test_numpy_power_grid(serial_no, x, y, power_level):
+    assert process_numpy.power_grid(serial_no)[y - 1, x - 1] == power_level
+
+
+@pytest.mark.parametrize('serial_no, largest_power', [
+    (18, process.Matrix(top_left_x=33, top_left_y=45, size=3, val=29)),
+    (42, process.Matrix(top_left_x=21, top_left_y=61, size=3, val=30)),
+])
+def test_numpy_largest_power_3_by_3(serial_no, largest_power):
+    chronal_charge = process_numpy.ChronalCharge(serial_no)
+    assert chronal_charge.largest_power(3) == largest_power
+    assert chronal_charge.largest_power_3_by_3() == (largest_power.top_left_x, largest_power.top_left_y)
+
+
+@pytest.mark.parametrize('serial_no, largest_power', [
+    (18, process.Matrix(top_left_x=90, top_left_y=269, size=16, val=113)),
+    (42, process.Matrix(top_left_x=232, top_left_y=251, size=12, val=119)),
+])
+def test_numpy_largest_power_all_k(serial_no, largest_power):
+    assert process_numpy.ChronalCharge(serial_no).largest_power_all_k() == largest_power
+
+
+@pytest.mark.parametrize('serial_no', [5093, 7403])
+@pytest.mark.parametrize('start_k, end_k', [(1, None), (5, None), (10, 20)])
+def test_numpy_engine_agrees(serial_no, start_k, end_k):
+    expected = process.ChronalCharge(serial_no).largest_power(start_k, end_k)
+    assert process_numpy.ChronalCharge(serial_no).largest_power(start_k, end_k) == expected
+
+
+def test_batch_answers_both_queries_for_every_serial():
+    chronal_charge_batch = process_numpy.ChronalChargeBatch([18, 42, 18])
+    assert chronal_charge_batch.largest_power_3_by_3() == {18: (33, 45), 42: (21, 61)}
+    assert chronal_charge_batch.largest_power_all_k() == {
+        18: process.Matrix(top_left_x=90, top_left_y=269, size=16, val=113),
+        42: process.Matrix(top_left_x=232, top_left_y=251, size=12, val=119),
+    }
+
+
+def test_batch_agrees_with_single_serial_engine():
+    serial_nos = list(range(7390, 7410))
+    chronal_charge_batch = process_numpy.ChronalChargeBatch(serial_nos, chunk_size=7)
+    largest_powers = chronal_charge_batch.largest_power(1, 40)
+    for serial_no in serial_nos:
+        assert largest_powers[serial_no] == process_numpy.ChronalCharge(serial_no).largest_power(1, 40)
+
+
+def test_summed_grid_cache_evicts_least_recently_used():
+    cache = process_numpy.SummedGridCache(maxsize=2)
+    summed_grids = cache.get([1, 2])
+    assert (summed_grids[0] == process_numpy.summed_area_table(process_numpy.power_grid(1))).all()
+    cache.get([1])
+    cache.get([3])
+    assert len(cache) == 2
+    assert 1 in cache and 3 in cache and 2 not in cache
+
+
+def test_batch_serves_repeated_query_from_cache(monkeypatch):
+    chronal_charge_batch = process_numpy.ChronalChargeBatch([18, 42])
+    largest_powers = chronal_charge_batch.largest_power(1, 20)
+
+    calls = []
+    square_sums = process_numpy.square_sums
+    monkeypatch.setattr(process_numpy, 'square_sums', lambda *args: calls.append(args) or square_sums(*args))
+    assert chronal_charge_batch.largest_power(1, 20) == largest_powers
+    assert not calls
+
+    # a different range is a different query
+    chronal_charge_batch.largest_power(1, 21)
+    assert calls
+
+
+def test_balanced_k_chunks_cover_range():
+    k_chunks = process_numpy.balanced_k_chunks(1, 300, 300, 4)
+    assert len(k_chunks) == 4
+    assert [k for start_k, end_k in k_chunks for k in range(start_k, end_k + 1)] == list(range(1, 301))
+    costs = [sum((300 - k + 1) ** 2 for k in range(start_k, end_k + 1)) for start_k, end_k in k_chunks]
+    assert max(costs) < 2 * min(costs)
+
+
+@pytest.mark.parametrize('serial_no', [18, 42])
+def test_parallel_largest_power_all_k(serial_no):
+    chronal_charge = process_numpy.ChronalCharge(serial_no)
+    assert chronal_charge.largest_power_all_k(workers=3) == chronal_charge.largest_power_all_k()
@@ -0,0 +1,40 @@
+import random
+import time
+
+from advent_of_code.puzzles.year_2018.day_12 import process
+from advent_of_code.puzzles.year_2018.day_12 import process_bitmask
+
+
+ENGINES = {
+    'process': process.PlantGeneration,
+    'process_bitmask': process_bitmask.PlantGeneration,
+}
+
+
+def random_row(pots, seed=0):
+    rng = random.Random(seed)
+    first_gen = {position: rng.choice([process.PLANT, process.NO_PLANT]) for position in range(pots)}
+    first_gen[0] = first_gen[pots - 1] = process.PLANT
+    return first_gen
+
+
+def seconds_per_generation(engine, first_gen, spread, generations):
+    plant_gen = ENGINES[engine](first_gen, spread)
+    start = time.perf_counter()
+    for _ in range(generations):
+        next(plant_gen)
+    return (time.perf_counter() - start) / generations, plant_gen.total
+
+
+def main():
+    subterranean_sustainability = process.SubterraneanSustainability.read_file()
+    for pots in (100, 1_000, 10_000):
+        first_gen = random_row(pots)
+        print(f'Row of {pots} pots:')
+        for engine in ENGINES:
+            seconds, total = seconds_per_generation(engine, first_gen, subterranean_sustainability.spread, 20)
+            print(f'{engine:>16}: {seconds * 1000:.3f} ms per generation, total after 20 gen {total}')
+
+
+if __name__ == '__main__':
+    main()
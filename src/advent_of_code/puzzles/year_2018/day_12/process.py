@@ -40,6 +40,14 @@ class PlantGeneration:
     def number(self):
         return sum(bool(plant) for plant in self.gen_queue if plant.plant == PLANT)
 
+    @property
+    def pattern(self):
+        return ''.join(plant.plant for plant in self.gen_queue)
+
+    @property
+    def offset(self):
+        return self.gen_queue[0].position
+
     def __iter__(self):
         return self
 
@@ -94,12 +102,33 @@ class PlantGeneration:
         self.gen_queue = next_gen
 
 
+@dataclasses.dataclass(frozen=True)
+class Cycle:
+    """
+    Plant rows from generation start onwards repeat every period generations, shifted drift pots to the right.
+
+    totals and numbers hold the plant total and plant number for the generations start to start + period - 1.
+    """
+    start: int
+    period: int
+    drift: int
+    totals: list
+    numbers: list
+
+    def total(self, generation):
+        cycles, cycle_generation = divmod(generation - self.start, self.period)
+        return self.totals[cycle_generation] + self.numbers[cycle_generation] * self.drift * cycles
+
+
 class SubterraneanSustainability:
 
-    def __init__(self, input_, is_full_input=True):
+    def __init__(self, input_, is_full_input=True, plant_generation_cls=PlantGeneration):
         self.initial_state = None
         self.plant_gen = None
         self.spread = None
+        self.plant_generation_cls = plant_generation_cls
+        self.cycle = None
+        self.totals = None
         self._preprocess(input_, is_full_input)
 
     @classmethod
@@ -118,22 +147,52 @@ class SubterraneanSustainability:
             elif line_no >= 2:
                 input_, output = line.split(' => ')
                 self.spread[input_] = output
-        self.plant_gen = PlantGeneration(self.initial_state, self.spread)
+        self.plant_gen = self.plant_generation_cls(self.initial_state, self.spread)
 
     def restart(self):
-        self.plant_gen = PlantGeneration(self.initial_state, self.spread)
+        self.plant_gen = self.plant_generation_cls(self.initial_state, self.spread)
 
     def __iter__(self):
+        """
+        Yield each generation until a row pattern repeats one seen before, at any offset.
+
+        The repeat is recorded in self.cycle, and the total and number of plants of every generation visited are kept
+        in self.totals and self.numbers so that later generations can be extrapolated.
+        """
+        first_seen = {self.plant_gen.pattern: 0}
+        offsets = [self.plant_gen.offset]
+        self.totals = [self.plant_gen.total]
+        self.numbers = [self.plant_gen.number]
+        self.cycle = None
         i = 0
         while True:
             i += 1
             next(self.plant_gen)
-            current_gen_plants = ''.join(plant.plant for plant in self.plant_gen.gen_queue)
-            last_gen_plants = ''.join(plant.plant for plant in self.plant_gen.previous_gen_queue)
-            if current_gen_plants == last_gen_plants:
+            offsets.append(self.plant_gen.offset)
+            self.totals.append(self.plant_gen.total)
+            self.numbers.append(self.plant_gen.number)
+            pattern = self.plant_gen.pattern
+            if (start := first_seen.get(pattern)) is not None:
+                self.cycle = Cycle(
+                    start=start,
+                    period=i - start,
+                    drift=offsets[i] - offsets[start],
+                    totals=self.totals[start:i],
+                    numbers=self.numbers[start:i],
+                )
                 return self.plant_gen, i
+            first_seen[pattern] = i
             yield self.plant_gen
 
+    def total_after(self, generations):
+        self.restart()
+        for _ in self:
+            if len(self.totals) > generations:
+                return self.totals[generations]
+        if generations < len(self.totals):
+            return self.totals[generations]
+        return self.cycle.total(generations)
+
 
 def main():
     subterranean_sustainability = SubterraneanSustainability.read_file()
@@ -143,23 +202,7 @@ def main():
         plants = next(plant_gen)
     print('Plant total after 20 gen:', plants.total)
 
-    subterranean_sustainability.restart()
-
-    plant_gen = iter(subterranean_sustainability)
-    while True:
-        try:
-            next(plant_gen)
-        except StopIteration as e:
-            plants_first_repetition, plants_first_repetition_iteration = e.value
-            break
-
-    gens = 50_000_000_000
-    initial_plant_total = plants_first_repetition.total
-    plant_number = plants_first_repetition.number
-    gens_to_go = gens - plants_first_repetition_iteration
-
-    total = initial_plant_total + plant_number * gens_to_go
-    print('Plant total after 50 bil gen:', total)
+    print('Plant total after 50 bil gen:', subterranean_sustainability.total_after(50_000_000_000))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,108 @@
+import timeit
+
+from advent_of_code.puzzles.year_2018.day_12.process import NO_PLANT
+from advent_of_code.puzzles.year_2018.day_12.process import PLANT
+from advent_of_code.puzzles.year_2018.day_12.process import SubterraneanSustainability
+
+
+NEIGHBOURHOOD = 5
+
+
+def compile_spread(spread):
+    """
+    Compile spread into a 32-entry lookup table indexed by a 5-bit neighbourhood.
+
+    Bit j of the index is the pot j - 2 places from the centre pot, so the leftmost pot is the least significant bit.
+    Neighbourhoods missing from spread produce no plant.
+    """
+    spread_table = []
+    for neighbourhood in range(2 ** NEIGHBOURHOOD):
+        surrounding_plants = ''.join(
+            PLANT if neighbourhood >> pot & 1 else NO_PLANT for pot in range(NEIGHBOURHOOD)
+        )
+        spread_table.append(spread.get(surrounding_plants, NO_PLANT) == PLANT)
+    return spread_table
+
+
+class PlantGeneration:
+    """
+    Plant row held as an int bitmask, where bit i is the pot at position offset + i.
+
+    The row is kept trimmed so that bit 0 and the highest set bit are both plants.
+    """
+
+    def __init__(self, first_gen, spread):
+        self.spread = spread
+        self.spread_table = compile_spread(spread)
+        self.row = 0
+        self.offset = 0
+        if positions := [position for position, plant in first_gen.items() if plant == PLANT]:
+            self.offset = min(positions)
+            bits = ['0'] * (max(positions) - self.offset + 1)
+            for position in positions:
+                bits[position - self.offset] = '1'
+            self.row = int(''.join(reversed(bits)), 2)
+        self.previous_row = None
+        self.previous_offset = None
+
+    @property
+    def gen(self):
+        bits = bin(self.row)[:1:-1]
+        return {self.offset + pot: PLANT if bit == '1' else NO_PLANT for pot, bit in enumerate(bits)}
+
+    @property
+    def total(self):
+        bits = bin(self.row)[:1:-1]
+        return self.number * self.offset + sum(pot for pot, bit in enumerate(bits) if bit == '1')
+
+    @property
+    def number(self):
+        return self.row.bit_count()
+
+    @property
+    def pattern(self):
+        return self.row
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.previous_row = self.row
+        self.previous_offset = self.offset
+        self._calculate_next_gen()
+        return self.gen
+
+    def _calculate_next_gen(self):
+        # widened by two empty pots on each side, the neighbourhood of new pot t starts at bit t of the shifted row
+        widened_row = self.row << (NEIGHBOURHOOD - 1)
+        width_mask = (1 << (self.row.bit_length() + NEIGHBOURHOOD - 1)) - 1
+        shifted_rows = [widened_row >> pot for pot in range(NEIGHBOURHOOD)]
+        shifted_gaps = [~shifted_row & width_mask for shifted_row in shifted_rows]
+
+        next_row = 0
+        for neighbourhood, is_plant in enumerate(self.spread_table):
+            if not is_plant:
+                continue
+            matches = width_mask
+            for pot in range(NEIGHBOURHOOD):
+                matches &= shifted_rows[pot] if neighbourhood >> pot & 1 else shifted_gaps[pot]
+            next_row |= matches
+
+        self.offset -= 2
+        if next_row:
+            empty_left_pots = (next_row & -next_row).bit_length() - 1
+            next_row >>= empty_left_pots
+            self.offset += empty_left_pots
+        self.row = next_row
+
+
+def main():
+    subterranean_sustainability = SubterraneanSustainability.read_file()
+    plant_gen = PlantGeneration(subterranean_sustainability.initial_state, subterranean_sustainability.spread)
+    for _ in range(20):
+        next(plant_gen)
+    print('Plant total after 20 gen:', plant_gen.total)
+
+
+if __name__ == '__main__':
+    print(f'Completed in {timeit.timeit(main, number=1)} seconds')
@@ -0,0 +1,241 @@
+import collections
+import timeit
+import weakref
+
+from advent_of_code.puzzles.year_2018.day_12.process import NO_PLANT
+from advent_of_code.puzzles.year_2018.day_12.process import PLANT
+from advent_of_code.puzzles.year_2018.day_12.process import SubterraneanSustainability
+from advent_of_code.puzzles.year_2018.day_12.process_bitmask import NEIGHBOURHOOD
+from advent_of_code.puzzles.year_2018.day_12.process_bitmask import compile_spread
+
+
+DEFAULT_MEMO_SIZE = 1_000_000
+
+# the smallest node that can be advanced: 8 pots give the centre 4 pots a full neighbourhood for one generation
+BASE_LEVEL = 3
+
+
+class Node:
+    """
+    Row segment of 2 ** level pots, built from two halves of the level below.
+
+    Nodes are hash-consed by RowSpace, so two segments with the same pots are the same object.
+    """
+
+    __slots__ = ('level', 'left', 'right', 'number', 'position_total', 'first', 'last', '__weakref__')
+
+    def __init__(self, level, left=None, right=None, is_plant=False):
+        self.level = level
+        self.left = left
+        self.right = right
+        if level == 0:
+            self.number = int(is_plant)
+            self.position_total = 0
+            self.first = self.last = 0 if is_plant else None
+            return
+        half = 1 << (level - 1)
+        self.number = left.number + right.number
+        # positions are relative to the leftmost pot of the segment
+        self.position_total = left.position_total + right.position_total + right.number * half
+        self.first = left.first if left.first is not None else (
+            None if right.first is None else right.first + half
+        )
+        self.last = right.last + half if right.last is not None else left.last
+
+
+class RowSpace:
+    """
+    Hash-consed row segments with a memo of how each segment's centre half looks 2 ** j generations later.
+
+    The memo holds at most memo_size results and evicts the least recently used. Segments no longer referenced by the
+    memo or by a row are dropped from the hash-consing table.
+    """
+
+    def __init__(self, spread, memo_size=DEFAULT_MEMO_SIZE):
+        self.spread_table = compile_spread(spread)
+        if self.spread_table[0]:
+            raise ValueError('Plants growing from an empty neighbourhood would fill an infinite row')
+        self.memo_size = memo_size
+        self._nodes = weakref.WeakValueDictionary()
+        self._memo = collections.OrderedDict()
+        self._empty = [Node(0, is_plant=False)]
+        self.plant = Node(0, is_plant=True)
+
+    def __len__(self):
+        return len(self._memo)
+
+    def join(self, left, right):
+        key = (left, right)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(left.level + 1, left, right)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level):
+        while len(self._empty) <= level:
+            self._empty.append(self.join(self._empty[-1], self._empty[-1]))
+        return self._empty[level]
+
+    def from_pots(self, pots):
+        nodes = [self.plant if is_plant else self._empty[0] for is_plant in pots]
+        level = 0
+        while level < BASE_LEVEL or len(nodes) > 1:
+            if len(nodes) % 2:
+                nodes.append(self.empty(level))
+            nodes = [self.join(left, right) for left, right in zip(nodes[::2], nodes[1::2])]
+            level += 1
+        return nodes[0]
+
+    def pots(self, node):
+        if node.level == 0:
+            return [node is self.plant]
+        if node.number == 0:
+            return [False] * (1 << node.level)
+        return self.pots(node.left) + self.pots(node.right)
+
+    def centre(self, node):
+        return self.join(node.left.right, node.right.left)
+
+    def expand(self, node):
+        empty = self.empty(node.level - 1)
+        return self.join(self.join(empty, node.left), self.join(node.right, empty))
+
+    def result(self, node, j):
+        """
+        Return the centre half of node after 2 ** j generations, where j is at most node.level - BASE_LEVEL.
+        """
+        key = (node, j)
+        if (result := self._memo.get(key)) is not None:
+            self._memo.move_to_end(key)
+            return result
+
+        if node.number == 0:
+            result = self.empty(node.level - 1)
+        elif node.level == BASE_LEVEL:
+            result = self._base_result(node)
+        else:
+            # three overlapping halves, each reduced to its centre quarter, either advanced or as they are
+            halves = (node.left, self.join(node.left.right, node.right.left), node.right)
+            if j == node.level - BASE_LEVEL:
+                step = j - 1
+                quarters = [self.result(half, step) for half in halves]
+            else:
+                step = j
+                quarters = [self.centre(half) for half in halves]
+            result = self.join(
+                self.result(self.join(quarters[0], quarters[1]), step),
+                self.result(self.join(quarters[1], quarters[2]), step),
+            )
+
+        self._memo[key] = result
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return result
+
+    def _base_result(self, node):
+        pots = self.pots(node)
+        next_pots = []
+        for pot in range(2, 2 + (1 << (BASE_LEVEL - 1))):
+            neighbourhood = sum(pots[pot - 2 + i] << i for i in range(NEIGHBOURHOOD))
+            next_pots.append(self.spread_table[neighbourhood])
+        return self.join(
+            self.join(*[self.plant if is_plant else self._empty[0] for is_plant in next_pots[:2]]),
+            self.join(*[self.plant if is_plant else self._empty[0] for is_plant in next_pots[2:]]),
+        )
+
+
+class PlantGeneration:
+    """
+    Plant row held as a hash-consed segment tree, advanced with memoized power-of-two jumps in the style of hashlife.
+
+    root covers the pots from position origin onwards.
+    """
+
+    def __init__(self, first_gen, spread, memo_size=DEFAULT_MEMO_SIZE):
+        self.spread = spread
+        self.row_space = RowSpace(spread, memo_size)
+        positions = [position for position, plant in first_gen.items() if plant == PLANT]
+        self.origin = min(positions, default=0)
+        pots = [False] * (max(positions, default=0) - self.origin + 1)
+        for position in positions:
+            pots[position - self.origin] = True
+        self.root = self.row_space.from_pots(pots)
+
+    @property
+    def gen(self):
+        pots = self._pots()
+        return {self.offset + pot: PLANT if is_plant else NO_PLANT for pot, is_plant in enumerate(pots)}
+
+    @property
+    def total(self):
+        return self.origin * self.root.number + self.root.position_total
+
+    @property
+    def number(self):
+        return self.root.number
+
+    @property
+    def pattern(self):
+        return ''.join(PLANT if is_plant else NO_PLANT for is_plant in self._pots())
+
+    @property
+    def offset(self):
+        return self.origin + (self.root.first or 0)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.advance(1)
+        return self.gen
+
+    def advance(self, generations):
+        for j in range(generations.bit_length()):
+            if generations >> j & 1:
+                self._advance_power_of_two(j)
+
+    def _advance_power_of_two(self, j):
+        if self.root.number == 0:
+            return
+        spread_distance = 2 << j
+        # plants spread at most two pots a generation, so pad until they cannot leave the centre half
+        while True:
+            size = 1 << self.root.level
+            if (
+                self.root.level >= j + BASE_LEVEL
+                and self.root.first - spread_distance >= size // 4
+                and self.root.last + spread_distance < 3 * size // 4
+            ):
+                break
+            self.origin -= size // 2
+            self.root = self.row_space.expand(self.root)
+        self.root = self.row_space.result(self.root, j)
+        self.origin += size // 4
+        self._crop()
+
+    def _crop(self):
+        while self.root.level > BASE_LEVEL and self.root.number:
+            size = 1 << self.root.level
+            if not (self.root.first >= size // 4 and self.root.last < 3 * size // 4):
+                break
+            self.root = self.row_space.centre(self.root)
+            self.origin += size // 4
+
+    def _pots(self):
+        if self.root.number == 0:
+            return []
+        return self.row_space.pots(self.root)[self.root.first:self.root.last + 1]
+
+
+def main():
+    subterranean_sustainability = SubterraneanSustainability.read_file()
+    plant_gen = PlantGeneration(subterranean_sustainability.initial_state, subterranean_sustainability.spread)
+    plant_gen.advance(20)
+    print('Plant total after 20 gen:', plant_gen.total)
+    plant_gen.advance(50_000_000_000 - 20)
+    print('Plant total after 50 bil gen:', plant_gen.total)
+
+
+if __name__ == '__main__':
+    print(f'Completed in {timeit.timeit(main, number=1)} seconds')
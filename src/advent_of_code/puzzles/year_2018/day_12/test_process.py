@@ -1,8 +1,14 @@
+import itertools
+import random
+
+import pytest
+
 from advent_of_code.puzzles.year_2018.day_12 import process
+from advent_of_code.puzzles.year_2018.day_12 import process_bitmask
+from advent_of_code.puzzles.year_2018.day_12 import process_hashlife
 
 
-def test_plants():
-    input_ = """\
+EXAMPLE_INPUT = """\
 initial state: #..#.#..##......###...###
 
 ...## => #
@@ -19,6 +25,10 @@ initial state: #..#.#..##......###...###
 ###.. => #
 ###.# => #
 ####. => #"""
+
+
+def test_plants():
+    input_ = EXAMPLE_INPUT
     subterranean_sustainability = process.SubterraneanSustainability(input_, is_full_input=False)
     plant_gen = iter(subterranean_sustainability)
     plants = None
@@ -66,3 +76,173 @@ initial state: #..#.#..##......###...###
     assert plants.gen == exp_plants
     assert plants.total == 325
 
+
+def test_bitmask_plants():
+    subterranean_sustainability = process.SubterraneanSustainability(EXAMPLE_INPUT, is_full_input=False)
+    plant_gen = process_bitmask.PlantGeneration(
+        subterranean_sustainability.initial_state, subterranean_sustainability.spread
+    )
+    plants = None
+    for _ in range(20):
+        plants = next(plant_gen)
+    expected_plant_gen = subterranean_sustainability.plant_gen
+    for _ in range(20):
+        next(expected_plant_gen)
+    assert plants == expected_plant_gen.gen
+    assert plant_gen.total == 325
+    assert plant_gen.number == expected_plant_gen.number
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_bitmask_engine_agrees_on_random_rows_and_rules(seed):
+    rng = random.Random(seed)
+    spread = {''.join(pots): rng.choice('#.') for pots in itertools.product('#.', repeat=5)}
+    spread['.....'] = '.'
+    first_gen = {position: rng.choice('#.') for position in range(-10, 60)}
+    first_gen[-10] = first_gen[59] = '#'
+    plant_gen = process.PlantGeneration(first_gen, spread)
+    bitmask_plant_gen = process_bitmask.PlantGeneration(first_gen, spread)
+    for _ in range(30):
+        if not plant_gen.number:
+            break
+        next(plant_gen)
+        next(bitmask_plant_gen)
+        assert bitmask_plant_gen.gen == plant_gen.gen
+        assert bitmask_plant_gen.total == plant_gen.total
+        assert bitmask_plant_gen.number == plant_gen.number
+
+
+OSCILLATING_INPUT = """\
+initial state: #..#.#..##
+
+##### => #
+####. => #
+##.## => #
+##..# => #
+#.### => #
+#.#.# => #
+#.#.. => #
+#...# => #
+.#### => #
+.##.. => #
+.#..# => #
+..##. => #
+..#.. => #"""
+
+
+DRIFTING_INPUT = """\
+initial state: #..#.#..##
+
+##### => #
+####. => #
+###.# => #
+##.## => #
+##.#. => #
+##... => #
+#.### => #
+#.#.# => #
+#..## => #
+#...# => #
+#.... => #
+.##.. => #
+.#.## => #
+.#.#. => #
+.#..# => #
+..#.# => #
+...#. => #"""
+
+
+def _brute_force_totals(input_, generations):
+    subterranean_sustainability = process.SubterraneanSustainability(input_, is_full_input=False)
+    plant_gen = subterranean_sustainability.plant_gen
+    totals = [plant_gen.total]
+    for _ in range(generations):
+        next(plant_gen)
+        totals.append(plant_gen.total)
+    return totals
+
+
+@pytest.mark.parametrize('input_, start, period, drift', [
+    (OSCILLATING_INPUT, 4, 3, 0),
+    (DRIFTING_INPUT, 20, 16, 32),
+])
+def test_cycle_detection(input_, start, period, drift):
+    subterranean_sustainability = process.SubterraneanSustainability(input_, is_full_input=False)
+    for _ in subterranean_sustainability:
+        pass
+    cycle = subterranean_sustainability.cycle
+    assert (cycle.start, cycle.period, cycle.drift) == (start, period, drift)
+
+
+@pytest.mark.parametrize('input_', [EXAMPLE_INPUT, OSCILLATING_INPUT, DRIFTING_INPUT])
+@pytest.mark.parametrize('plant_generation_cls', [
+    process.PlantGeneration,
+    process_bitmask.PlantGeneration,
+    process_hashlife.PlantGeneration,
+])
+def test_total_after_extrapolates_cycle(input_, plant_generation_cls):
+    subterranean_sustainability = process.SubterraneanSustainability(
+        input_, is_full_input=False, plant_generation_cls=plant_generation_cls
+    )
+    totals = _brute_force_totals(input_, 250)
+    for generations in [0, 1, 20, 99, 100, 101, 187, 250]:
+        assert subterranean_sustainability.total_after(generations) == totals[generations]
+
+
+def test_total_after_fifty_billion_generations():
+    subterranean_sustainability = process.SubterraneanSustainability(EXAMPLE_INPUT, is_full_input=False)
+    cycle_total = subterranean_sustainability.total_after(1000)
+    number = subterranean_sustainability.cycle.numbers[0]
+    drift_per_generation = subterranean_sustainability.cycle.drift // subterranean_sustainability.cycle.period
+    assert subterranean_sustainability.total_after(50_000_000_000) == (
+        cycle_total + number * drift_per_generation * (50_000_000_000 - 1000)
+    )
+
+
+@pytest.mark.parametrize('input_', [EXAMPLE_INPUT, OSCILLATING_INPUT, DRIFTING_INPUT])
+def test_hashlife_engine_agrees_with_bitmask_engine(input_):
+    subterranean_sustainability = process.SubterraneanSustainability(input_, is_full_input=False)
+    bitmask_plant_gen = process_bitmask.PlantGeneration(
+        subterranean_sustainability.initial_state, subterranean_sustainability.spread
+    )
+    hashlife_plant_gen = process_hashlife.PlantGeneration(
+        subterranean_sustainability.initial_state, subterranean_sustainability.spread
+    )
+    for _ in range(100):
+        assert next(hashlife_plant_gen) == next(bitmask_plant_gen)
+        assert hashlife_plant_gen.total == bitmask_plant_gen.total
+        assert hashlife_plant_gen.number == bitmask_plant_gen.number
+    for generations in [1, 7, 64, 1000]:
+        for _ in range(generations):
+            next(bitmask_plant_gen)
+        hashlife_plant_gen.advance(generations)
+        assert hashlife_plant_gen.gen == bitmask_plant_gen.gen
+        assert hashlife_plant_gen.total == bitmask_plant_gen.total
+
+
+def test_hashlife_jumps_rule_that_never_settles():
+    # each pot becomes the exclusive or of its two nearest neighbours, which grows a Sierpinski triangle
+    spread = {
+        ''.join(pots): process.PLANT if (pots[1] == process.PLANT) != (pots[3] == process.PLANT) else process.NO_PLANT
+        for pots in itertools.product(process.PLANT + process.NO_PLANT, repeat=5)
+    }
+    bitmask_plant_gen = process_bitmask.PlantGeneration({0: process.PLANT}, spread)
+    for _ in range(1000):
+        next(bitmask_plant_gen)
+    hashlife_plant_gen = process_hashlife.PlantGeneration({0: process.PLANT}, spread, memo_size=500)
+    hashlife_plant_gen.advance(1000)
+    assert hashlife_plant_gen.total == bitmask_plant_gen.total
+    assert hashlife_plant_gen.number == bitmask_plant_gen.number
+    assert len(hashlife_plant_gen.row_space) <= 500
+
+    # after 2 ** k generations the row is back to two plants, 2 ** k either side of the start
+    hashlife_plant_gen = process_hashlife.PlantGeneration({0: process.PLANT}, spread)
+    hashlife_plant_gen.advance(2 ** 40)
+    assert hashlife_plant_gen.number == 2
+    assert hashlife_plant_gen.offset == -2 ** 40
+    assert hashlife_plant_gen.total == 0
+
+
+def test_hashlife_rejects_plants_from_empty_neighbourhood():
+    with pytest.raises(ValueError):
+        process_hashlife.PlantGeneration({0: process.PLANT}, {'.....': process.PLANT})
@@ -0,0 +1,98 @@
+import itertools
+import random
+import time
+import tracemalloc
+
+from advent_of_code.puzzles.year_2018.day_13 import process
+from advent_of_code.puzzles.year_2018.day_13 import process_compiled
+from advent_of_code.puzzles.year_2018.day_13 import process_events
+
+
+ENGINES = {
+    'process': process.MineCartMadness,
+    'process_compiled': process_compiled.MineCartMadness,
+    'process_events': process_events.MineCartMadness,
+}
+
+# (width, height, loops, carts)
+TRACK_SIZES = [
+    (100, 100, 20, 9),
+    (400, 400, 40, 9),
+    (1_000, 1_000, 60, 9),
+]
+
+
+def generate_track(width, height, loops, carts, seed=0):
+    """
+    Generate a track of overlapping rectangular loops with carts dropped on random straight pieces.
+
+    Corners sit on even rows and columns, so parallel track is never adjacent and every curve is unambiguous. Loops
+    that would overlap another loop's track or corners are skipped, and crossings become intersections.
+    """
+    rng = random.Random(seed)
+    grid = [[' '] * width for _ in range(height)]
+    drawn = 0
+    for _ in range(loops * 20):
+        if drawn == loops:
+            break
+        left, right = sorted(rng.sample(range(0, width, 2), 2))
+        top, bottom = sorted(rng.sample(range(0, height, 2), 2))
+        corners = {(left, top): '/', (right, bottom): '/', (right, top): '\\', (left, bottom): '\\'}
+        if any(grid[y][x] != ' ' for x, y in corners):
+            continue
+        edges = {}
+        for x in range(left + 1, right):
+            edges[x, top] = edges[x, bottom] = '-'
+        for y in range(top + 1, bottom):
+            edges[left, y] = edges[right, y] = '|'
+        for (x, y), piece in edges.items():
+            if grid[y][x] == ' ':
+                continue
+            if {grid[y][x], piece} != {'-', '|'}:
+                break
+            edges[x, y] = '+'
+        else:
+            for (x, y), piece in itertools.chain(edges.items(), corners.items()):
+                grid[y][x] = piece
+            drawn += 1
+
+    straight_track = [(x, y) for y in range(height) for x in range(width) if grid[y][x] in '-|']
+    for x, y in rng.sample(straight_track, carts):
+        grid[y][x] = rng.choice('<>') if grid[y][x] == '-' else rng.choice('^v')
+    return '\n'.join(''.join(row) for row in grid)
+
+
+def run(engine, raw_track):
+    """
+    Return the crash coordinates, the last cart's coordinates, seconds taken and peak memory in bytes for one engine.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    crashes = []
+    mine_cart_madness_iter = iter(ENGINES[engine](raw_track))
+    while True:
+        try:
+            crashes.append(next(mine_cart_madness_iter))
+        except StopIteration as e:
+            last_cart = e.value
+            break
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return crashes, last_cart, seconds, peak
+
+
+def main():
+    for width, height, loops, carts in TRACK_SIZES:
+        raw_track = generate_track(width, height, loops, carts)
+        print(f'{width}x{height} track, {loops} loops, {carts} carts:')
+        for engine in ENGINES:
+            crashes, last_cart, seconds, peak = run(engine, raw_track)
+            print(
+                f'{engine:>16}: {seconds:.3f} seconds, peak memory {peak / 1024 ** 2:.1f} MiB, '
+                f'first crash {crashes[0].x},{crashes[0].y}, last cart {last_cart.x},{last_cart.y}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
-import collections
+import collections.abc
 import dataclasses
 import enum
+import re
 import timeit
 import typing
 
@@ -62,6 +63,19 @@ GRID_PIECE_DETAILS = {
 }
 
 
+LEFT_RIGHT_TRACK = {
+    grid_piece.value
+    for grid_piece, details in GRID_PIECE_DETAILS.items()
+    if details.is_horizontal
+}
+
+UP_DOWN_TRACK = {
+    grid_piece.value
+    for grid_piece, details in GRID_PIECE_DETAILS.items()
+    if details.is_vertical
+}
+
+
 class CartIntersectionDirections(enum.Enum):
     LEFT = 0
     STRAIGHT = 1
@@ -73,7 +87,7 @@ class CartIntersectionDirections(enum.Enum):
         )
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, slots=True)
 class Coords:
     x: int
     y: int
@@ -108,7 +122,89 @@ DIRECTION_COORDS = {
 }
 
 
-@dataclasses.dataclass()
+def _adj_offsets(*directions):
+    return tuple(
+        (direction, DIRECTION_COORDS[direction].x, DIRECTION_COORDS[direction].y)
+        for direction in directions
+    )
+
+
+# track character -> direction and offset of each piece of adjacent track
+ADJ_OFFSETS = {
+    RawGridPieces.TRACK_INTERSECTION.value: _adj_offsets(*Directions),
+    **{
+        grid_piece.value: (
+            _adj_offsets(Directions.UP, Directions.DOWN)
+            if details.is_vertical
+            else _adj_offsets(Directions.LEFT, Directions.RIGHT)
+        )
+        for grid_piece, details in GRID_PIECE_DETAILS.items()
+        if details.is_vertical != details.is_horizontal
+    },
+}
+
+# curve character -> column offset of the track beside it, adjacent track when joined
+# above, when joined below
+CURVE_ADJ_OFFSETS = {
+    RawGridPieces.TRACK_FORWARD_DIAGONAL.value: (
+        -1,
+        _adj_offsets(Directions.LEFT, Directions.UP),
+        _adj_offsets(Directions.RIGHT, Directions.DOWN),
+    ),
+    RawGridPieces.TRACK_BACKWARD_DIAGONAL.value: (
+        1,
+        _adj_offsets(Directions.RIGHT, Directions.UP),
+        _adj_offsets(Directions.LEFT, Directions.DOWN),
+    ),
+}
+
+# piece code -> direction and offset of each piece of adjacent track, with 0 for empty
+# space and a code for each curve joined above followed by one for it joined below
+PIECE_ADJ_OFFSETS = (
+    (),
+    *ADJ_OFFSETS.values(),
+    *(
+        adj_offsets
+        for _, up_adj_offsets, down_adj_offsets in CURVE_ADJ_OFFSETS.values()
+        for adj_offsets in (up_adj_offsets, down_adj_offsets)
+    ),
+)
+
+# curve character -> column offset of the track beside it, piece code when joined above,
+# when joined below
+CURVE_PIECE_CODES = {
+    track_char: (
+        side_offset,
+        len(ADJ_OFFSETS) + 1 + 2 * curve_no,
+        len(ADJ_OFFSETS) + 2 + 2 * curve_no,
+    )
+    for curve_no, (track_char, (side_offset, _, _)) in enumerate(
+        CURVE_ADJ_OFFSETS.items()
+    )
+}
+
+# track character -> piece code, with curves joined below until the row above says
+# otherwise
+PIECE_CODES = {
+    **{track_char: piece_code for piece_code, track_char in enumerate(ADJ_OFFSETS, 1)},
+    **{
+        track_char: down_piece_code
+        for track_char, (_, _, down_piece_code) in CURVE_PIECE_CODES.items()
+    },
+}
+
+# byte of a row -> piece code, for bytes.translate
+PIECE_CODE_TABLE = bytes(PIECE_CODES.get(chr(byte), 0) for byte in range(256))
+
+CURVE_PATTERN = re.compile("[" + re.escape("".join(CURVE_ADJ_OFFSETS)) + "]")
+CART_PATTERN = re.compile(
+    "[" + re.escape("".join(grid_piece.value for grid_piece in CART_DIRECTIONS)) + "]"
+)
+
+CART_CHARS = {grid_piece.value: grid_piece for grid_piece in CART_DIRECTIONS}
+
+
+@dataclasses.dataclass(slots=True)
 class TrackPiece:
 
     location: Coords
@@ -139,174 +235,120 @@ class TrackPiece:
             return direction, self.location + DIRECTION_COORDS[direction]
 
 
-class MineCartMadness:
-    @classmethod
-    def read_file(cls):
-        with open("input.txt") as f:
-            return cls(f.read().rstrip())
-
-    def __init__(self, raw_track):
-        raw_grid = raw_track.splitlines()
-        self.nrows = len(raw_grid)
-        self.ncols = len(raw_grid[0])
-
-        self.grid = collections.defaultdict(lambda: RawGridPieces.EMPTY)
-        for row_no, row in enumerate(raw_track.splitlines()):
-            for col_no, track_piece in enumerate(row):
-                self.grid[Coords(col_no, row_no)] = RawGridPieces(track_piece)
-
-        self.track = self._create_track()
-
-    def _create_track(self):
-        track = {}
-
-        left_right_track = {
-            grid_piece
-            for grid_piece, details in GRID_PIECE_DETAILS.items()
-            if details.is_horizontal
+class Track(collections.abc.Mapping):
+    """
+    Track pieces keyed by Coords, held as one piece code byte per cell of the map.
+
+    Empty space is code 0 and each curve has one code for joining the track above it and
+    one for joining the track below it, so adjacent track comes from the per-code offset
+    tables. TrackPiece objects are only made when looked up.
+    """
+
+    def __init__(self, rows, carts):
+        self.rows = rows
+        self.carts = carts
+
+    def piece_code(self, location):
+        if 0 <= location.y < len(self.rows):
+            row = self.rows[location.y]
+            if 0 <= location.x < len(row):
+                return row[location.x]
+        return 0
+
+    def adj_track(self, location):
+        return {
+            direction: Coords(location.x + x_offset, location.y + y_offset)
+            for direction, x_offset, y_offset in PIECE_ADJ_OFFSETS[
+                self.piece_code(location)
+            ]
         }
 
-        up_down_track = {
-            grid_piece
-            for grid_piece, details in GRID_PIECE_DETAILS.items()
-            if details.is_vertical
-        }
+    def __getitem__(self, location):
+        if not self.piece_code(location):
+            raise KeyError(location)
+        return TrackPiece(location, self.adj_track(location), self.carts.get(location))
 
-        for row_no in range(self.nrows):
-            for col_no in range(self.ncols):
-                track_position = Coords(col_no, row_no)
-                track_piece = self.grid[track_position]
+    def __iter__(self):
+        for row_no, row in enumerate(self.rows):
+            for col_no, piece_code in enumerate(row):
+                if piece_code:
+                    yield Coords(col_no, row_no)
 
-                if track_piece == RawGridPieces.EMPTY:
-                    continue
-                adj_positions = self._surrounding_coords(track_position)
-                populated_adj_positions = {
-                    direction: direction_coords
-                    for direction, direction_coords in adj_positions.items()
-                    if self.grid[direction_coords] != RawGridPieces.EMPTY
-                }
+    def __len__(self):
+        return sum(len(row) - row.count(0) for row in self.rows)
 
-                adj_track = None
-                cart = None
 
-                grid_piece_detail = GRID_PIECE_DETAILS[track_piece]
+class MineCartMadness:
+    @classmethod
+    def read_file(cls):
+        with open("input.txt") as f:
+            return cls.from_rows(f)
 
-                if (
-                    grid_piece_detail.is_vertical
-                    and not grid_piece_detail.is_horizontal
-                ):
-                    adj_track = {
-                        Directions.UP: populated_adj_positions[Directions.UP],
-                        Directions.DOWN: populated_adj_positions[Directions.DOWN],
-                    }
+    @classmethod
+    def from_rows(cls, rows):
+        mine_cart_madness = cls.__new__(cls)
+        mine_cart_madness.track = mine_cart_madness._create_track(rows)
+        return mine_cart_madness
 
+    def __init__(self, raw_track):
+        self.track = self._create_track(raw_track.splitlines())
+
+    def _create_track(self, rows):
+        """
+        Build the track in one pass over rows, which can be any iterable of lines such
+        as an open file.
+
+        Only the row above is kept, which is all that is needed to tell which way a
+        curve bends. Each row is translated to piece codes in one go, and only curves
+        and carts are looked at one by one.
+        """
+        track_rows = []
+        carts = {}
+        self.nrows = 0
+        self.ncols = 0
+        row_above = ""
+        for row_no, row in enumerate(rows):
+            row = row.rstrip("\n")
+            self.nrows = row_no + 1
+            self.ncols = max(self.ncols, len(row))
+            track_row = bytearray(row.encode("ascii").translate(PIECE_CODE_TABLE))
+
+            for curve_match in CURVE_PATTERN.finditer(row):
+                col_no = curve_match.start()
+                side_offset, up_piece_code, _ = CURVE_PIECE_CODES[curve_match.group()]
+                side_col_no = col_no + side_offset
+                # a curve joins the track above it or the track below it, never both
                 if (
-                    grid_piece_detail.is_horizontal
-                    and not grid_piece_detail.is_vertical
+                    col_no < len(row_above)
+                    and row_above[col_no] in UP_DOWN_TRACK
+                    and 0 <= side_col_no < len(row)
+                    and row[side_col_no] in LEFT_RIGHT_TRACK
                 ):
-                    adj_track = {
-                        Directions.LEFT: populated_adj_positions[Directions.LEFT],
-                        Directions.RIGHT: populated_adj_positions[Directions.RIGHT],
-                    }
-
-                if grid_piece_detail.is_cart:
-                    cart_direction = CART_DIRECTIONS[track_piece]
-                    previous_cart_location = (
-                        track_position + DIRECTION_COORDS[cart_direction.opposite()]
-                    )
-                    cart = Cart(cart_direction, previous_cart_location)
-
-                if track_piece == RawGridPieces.TRACK_FORWARD_DIAGONAL:
-                    is_left_up = (
-                        Directions.LEFT in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.LEFT]]
-                        in left_right_track
-                        and Directions.UP in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.UP]]
-                        in up_down_track
-                    )
-                    is_right_down = (
-                        Directions.RIGHT in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.RIGHT]]
-                        in left_right_track
-                        and Directions.DOWN in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.DOWN]]
-                        in up_down_track
-                    )
-                    assert is_left_up != is_right_down
-                    if is_left_up:
-                        adj_track = {
-                            Directions.LEFT: populated_adj_positions[Directions.LEFT],
-                            Directions.UP: populated_adj_positions[Directions.UP],
-                        }
-                    elif is_right_down:
-                        adj_track = {
-                            Directions.RIGHT: populated_adj_positions[Directions.RIGHT],
-                            Directions.DOWN: populated_adj_positions[Directions.DOWN],
-                        }
-                    else:
-                        raise Exception
-                if track_piece == RawGridPieces.TRACK_BACKWARD_DIAGONAL:
-                    is_left_down = (
-                        Directions.LEFT in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.LEFT]]
-                        in left_right_track
-                        and Directions.DOWN in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.DOWN]]
-                        in up_down_track
-                    )
-                    is_right_up = (
-                        Directions.RIGHT in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.RIGHT]]
-                        in left_right_track
-                        and Directions.UP in populated_adj_positions
-                        and self.grid[populated_adj_positions[Directions.UP]]
-                        in up_down_track
-                    )
-                    assert is_left_down != is_right_up
-                    if is_left_down:
-                        adj_track = {
-                            Directions.LEFT: populated_adj_positions[Directions.LEFT],
-                            Directions.DOWN: populated_adj_positions[Directions.DOWN],
-                        }
-                    elif is_right_up:
-                        adj_track = {
-                            Directions.RIGHT: populated_adj_positions[Directions.RIGHT],
-                            Directions.UP: populated_adj_positions[Directions.UP],
-                        }
-                    else:
-                        raise Exception
-                if track_piece == RawGridPieces.TRACK_INTERSECTION:
-                    adj_track = populated_adj_positions.copy()
-                track[track_position] = TrackPiece(track_position, adj_track, cart)
-        return track
-
-    def _surrounding_coords(self, coords: Coords):
-        surrounding_coords = {}
-        for direction, direction_coord in DIRECTION_COORDS.items():
-            new_x = coords.x + direction_coord.x
-            new_y = coords.y + direction_coord.y
-            if 0 <= new_x < self.ncols and 0 <= new_y < self.nrows:
-                surrounding_coords[direction] = Coords(new_x, new_y)
-            else:
-                # out of bounds
-                continue
-        return surrounding_coords
+                    track_row[col_no] = up_piece_code
+
+            for cart_match in CART_PATTERN.finditer(row):
+                track_position = Coords(cart_match.start(), row_no)
+                cart_direction = CART_DIRECTIONS[CART_CHARS[cart_match.group()]]
+                carts[track_position] = Cart(
+                    cart_direction,
+                    track_position + DIRECTION_COORDS[cart_direction.opposite()],
+                )
+
+            track_rows.append(bytes(track_row))
+            row_above = row
+        return Track(track_rows, carts)
 
     def __iter__(self):
+        carts = self.track.carts
         while True:
-            carts_on_track = {
-                track_location: track_piece
-                for track_location, track_piece in self.track.items()
-                if track_piece.cart
-            }
-            if len(carts_on_track) == 1:
-                for track_location, track_piece in carts_on_track.items():
-                    if track_piece.cart is not None:
-                        return track_location
-            for track_location, track_piece in carts_on_track.items():
-                cart: typing.Optional[Cart] = track_piece.cart
-                if cart is None:
+            if len(carts) == 1:
+                (track_location,) = carts
+                return track_location
+            carts_on_track = sorted(
+                carts.items(), key=lambda item: (item[0].y, item[0].x)
+            )
+            for track_location, cart in carts_on_track:
+                if carts.get(track_location) is not cart:
                     # there was a cart here previously on this tick but not anymore
                     continue
                 track_piece = self.track[track_location]
@@ -334,19 +376,17 @@ class MineCartMadness:
                         direction=cart.cart_direction,
                     )
 
-                track_piece.cart = None
+                del carts[track_location]
 
                 cart.cart_direction = cart_direction
                 cart.previous_location = track_location
 
-                next_track_piece = self.track[next_track_location]
-
-                if next_track_piece.cart is not None:
+                if next_track_location in carts:
                     # crash
                     yield next_track_location
-                    next_track_piece.cart = None
+                    del carts[next_track_location]
                 else:
-                    next_track_piece.cart = cart
+                    carts[next_track_location] = cart
 
 
 def main():
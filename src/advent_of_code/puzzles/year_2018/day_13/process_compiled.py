@@ -0,0 +1,177 @@
+import re
+import timeit
+
+from advent_of_code.puzzles.year_2018.day_13.process import CART_DIRECTIONS
+from advent_of_code.puzzles.year_2018.day_13.process import CartIntersectionDirections
+from advent_of_code.puzzles.year_2018.day_13.process import Coords
+from advent_of_code.puzzles.year_2018.day_13.process import Directions
+from advent_of_code.puzzles.year_2018.day_13.process import RawGridPieces
+
+
+EMPTY = 0
+STRAIGHT = 1
+FORWARD_CURVE = 2
+BACKWARD_CURVE = 3
+INTERSECTION = 4
+CELL_TYPES = 5
+
+CELL_CODES = {
+    RawGridPieces.EMPTY: EMPTY,
+    RawGridPieces.TRACK_UP_DOWN: STRAIGHT,
+    RawGridPieces.TRACK_LEFT_RIGHT: STRAIGHT,
+    RawGridPieces.TRACK_FORWARD_DIAGONAL: FORWARD_CURVE,
+    RawGridPieces.TRACK_BACKWARD_DIAGONAL: BACKWARD_CURVE,
+    RawGridPieces.TRACK_INTERSECTION: INTERSECTION,
+    # carts always start on straight track
+    RawGridPieces.CART_UP: STRAIGHT,
+    RawGridPieces.CART_RIGHT: STRAIGHT,
+    RawGridPieces.CART_DOWN: STRAIGHT,
+    RawGridPieces.CART_LEFT: STRAIGHT,
+}
+
+
+def _cell_table():
+    # bytes.translate table from track characters to cell codes
+    cell_table = bytearray(256)
+    for grid_piece, cell in CELL_CODES.items():
+        cell_table[ord(grid_piece.value)] = cell
+    return bytes(cell_table)
+
+
+CELL_TABLE = _cell_table()
+
+CART_PATTERN = re.compile('[' + re.escape(''.join(piece.value for piece in CART_DIRECTIONS)) + ']')
+
+FORWARD_CURVE_TURNS = {
+    Directions.UP: Directions.RIGHT,
+    Directions.RIGHT: Directions.UP,
+    Directions.DOWN: Directions.LEFT,
+    Directions.LEFT: Directions.DOWN,
+}
+BACKWARD_CURVE_TURNS = {
+    Directions.UP: Directions.LEFT,
+    Directions.LEFT: Directions.UP,
+    Directions.DOWN: Directions.RIGHT,
+    Directions.RIGHT: Directions.DOWN,
+}
+
+# a cart's heading packs its direction and the turn it takes at its next intersection into one int
+HEADINGS = len(Directions) * len(CartIntersectionDirections)
+
+
+def heading(direction, intersection_direction):
+    return direction.value * len(CartIntersectionDirections) + intersection_direction.value
+
+
+def heading_direction(heading_):
+    return Directions(heading_ // len(CartIntersectionDirections))
+
+
+def _next_heading(cell, direction, intersection_direction):
+    if cell == FORWARD_CURVE:
+        direction = FORWARD_CURVE_TURNS[direction]
+    elif cell == BACKWARD_CURVE:
+        direction = BACKWARD_CURVE_TURNS[direction]
+    elif cell == INTERSECTION:
+        if intersection_direction == CartIntersectionDirections.LEFT:
+            direction = direction.turn_left()
+        elif intersection_direction == CartIntersectionDirections.RIGHT:
+            direction = direction.turn_right()
+        intersection_direction = intersection_direction.next()
+    return heading(direction, intersection_direction)
+
+
+# indexed by cell * HEADINGS + heading
+TRANSITIONS = [
+    _next_heading(cell, direction, intersection_direction)
+    for cell in range(CELL_TYPES)
+    for direction in Directions
+    for intersection_direction in CartIntersectionDirections
+]
+
+
+class MineCartMadness:
+    """
+    Track compiled to a flat bytearray of cell codes, indexed by y * width + x.
+
+    Turning is a single lookup in TRANSITIONS and moving adds the heading's precomputed offset, so a tick only touches
+    the carts, which are kept sorted in reading order by their flat position.
+    """
+
+    @classmethod
+    def read_file(cls):
+        with open("input.txt") as f:
+            return cls(f.read().rstrip())
+
+    def __init__(self, raw_track):
+        raw_grid = raw_track.splitlines()
+        self.nrows = len(raw_grid)
+        self.ncols = max(len(row) for row in raw_grid)
+
+        self.cells = bytearray()
+        self.carts = []
+        for row_no, row in enumerate(raw_grid):
+            self.cells += row.ljust(self.ncols).encode().translate(CELL_TABLE)
+            for cart_match in CART_PATTERN.finditer(row):
+                cart_direction = CART_DIRECTIONS[RawGridPieces(cart_match.group())]
+                self.carts.append(
+                    (row_no * self.ncols + cart_match.start(), heading(cart_direction, CartIntersectionDirections.LEFT))
+                )
+
+        direction_offsets = {
+            Directions.UP: -self.ncols,
+            Directions.RIGHT: 1,
+            Directions.DOWN: self.ncols,
+            Directions.LEFT: -1,
+        }
+        self.heading_offsets = [direction_offsets[heading_direction(heading_)] for heading_ in range(HEADINGS)]
+
+    def _coords(self, position):
+        row_no, col_no = divmod(position, self.ncols)
+        return Coords(col_no, row_no)
+
+    def __iter__(self):
+        cells = self.cells
+        heading_offsets = self.heading_offsets
+        carts = sorted(self.carts)
+        while True:
+            if len(carts) == 1:
+                (position, _), = carts
+                return self._coords(position)
+            # position -> index in moved_carts, or None for a cart yet to move this tick
+            occupied = dict.fromkeys(position for position, _ in carts)
+            moved_carts = []
+            for position, heading_ in carts:
+                if position not in occupied or occupied[position] is not None:
+                    # hit by an earlier cart this tick
+                    continue
+                heading_ = TRANSITIONS[cells[position] * HEADINGS + heading_]
+                del occupied[position]
+                position += heading_offsets[heading_]
+                if position in occupied:
+                    yield self._coords(position)
+                    hit_cart_index = occupied.pop(position)
+                    if hit_cart_index is not None:
+                        moved_carts[hit_cart_index] = None
+                else:
+                    occupied[position] = len(moved_carts)
+                    moved_carts.append((position, heading_))
+            carts = sorted(cart for cart in moved_carts if cart is not None)
+
+
+def main():
+    mine_cart_madness = MineCartMadness.read_file()
+    mine_cart_madness_iter = iter(mine_cart_madness)
+    crash = next(mine_cart_madness_iter)
+    print(f"location of first crash: {crash.x},{crash.y}")
+    while True:
+        try:
+            next(mine_cart_madness_iter)
+        except StopIteration as e:
+            last_cart = e.value
+            break
+    print(f"location of last cart: {last_cart.x},{last_cart.y}")
+
+
+if __name__ == "__main__":
+    print(f"Completed in {timeit.timeit(main, number=1)} seconds")
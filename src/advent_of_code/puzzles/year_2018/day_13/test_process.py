@@ -1,4 +1,12 @@
+import io
+import tracemalloc
+
+import pytest
+
+from advent_of_code.puzzles.year_2018.day_13 import benchmark
 from advent_of_code.puzzles.year_2018.day_13 import process
+from advent_of_code.puzzles.year_2018.day_13 import process_compiled
+from advent_of_code.puzzles.year_2018.day_13 import process_events
 
 
 def test_one_pair_of_cart():
@@ -35,3 +43,120 @@ def test_multiple_pairs_of_carts():
             last_cart = e.value
             break
     assert last_cart == process.Coords(x=6, y=4)
+
+
+ONE_PAIR_OF_CARTS = '\n'.join([
+    r'/->-\        ',
+    r'|   |  /----' '\\',
+    r'| /-+--+-\  |',
+    r'| | |  | v  |',
+    r'\-+-/  \-+--/',
+    r'  \------/   ',
+])
+
+MULTIPLE_PAIRS_OF_CARTS = '\n'.join([
+    r'/>-<\  ',
+    r'|   |  ',
+    r'| /<+-' '\\',
+    r'| | | v',
+    r'\>+</ |',
+    r'  |   ^',
+    r'  \<->/',
+])
+
+
+def run_to_last_cart(mine_cart_madness):
+    crashes = []
+    mine_cart_madness_iter = iter(mine_cart_madness)
+    while True:
+        try:
+            crashes.append(next(mine_cart_madness_iter))
+        except StopIteration as e:
+            return crashes, e.value
+
+
+def test_compiled_one_pair_of_cart():
+    crash = next(iter(process_compiled.MineCartMadness(ONE_PAIR_OF_CARTS)))
+    assert crash == process.Coords(x=7, y=3)
+
+
+def test_compiled_multiple_pairs_of_carts():
+    crashes, last_cart = run_to_last_cart(process_compiled.MineCartMadness(MULTIPLE_PAIRS_OF_CARTS))
+    assert crashes == run_to_last_cart(process.MineCartMadness(MULTIPLE_PAIRS_OF_CARTS))[0]
+    assert last_cart == process.Coords(x=6, y=4)
+
+
+def test_compiled_transitions_match_track_pieces():
+    for direction in process.Directions:
+        for intersection_direction in process.CartIntersectionDirections:
+            heading = process_compiled.heading(direction, intersection_direction)
+            straight = process_compiled.TRANSITIONS[process_compiled.STRAIGHT * process_compiled.HEADINGS + heading]
+            assert straight == heading
+            intersection = process_compiled.TRANSITIONS[
+                process_compiled.INTERSECTION * process_compiled.HEADINGS + heading
+            ]
+            assert intersection % len(process.CartIntersectionDirections) == intersection_direction.next().value
+
+
+def test_events_one_pair_of_cart():
+    crash = next(iter(process_events.MineCartMadness(ONE_PAIR_OF_CARTS)))
+    assert crash == process.Coords(x=7, y=3)
+
+
+def test_events_multiple_pairs_of_carts():
+    crashes, last_cart = run_to_last_cart(process_events.MineCartMadness(MULTIPLE_PAIRS_OF_CARTS))
+    assert crashes == run_to_last_cart(process.MineCartMadness(MULTIPLE_PAIRS_OF_CARTS))[0]
+    assert last_cart == process.Coords(x=6, y=4)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_engines_agree_on_generated_tracks(seed):
+    raw_track = benchmark.generate_track(60, 60, 12, 9, seed)
+    expected = run_to_last_cart(process.MineCartMadness(raw_track))
+    assert run_to_last_cart(process_compiled.MineCartMadness(raw_track)) == expected
+    assert run_to_last_cart(process_events.MineCartMadness(raw_track)) == expected
+
+
+def test_create_track_stacked_loops():
+    track = process.MineCartMadness('\n'.join([
+        r'/-\ ',
+        r'\-/',
+        r'/-\ ',
+        r'\-/',
+    ])).track
+    assert track[process.Coords(0, 2)].adj_track == {
+        process.Directions.RIGHT: process.Coords(1, 2),
+        process.Directions.DOWN: process.Coords(0, 3),
+    }
+    assert track[process.Coords(2, 1)].adj_track == {
+        process.Directions.LEFT: process.Coords(1, 1),
+        process.Directions.UP: process.Coords(2, 0),
+    }
+    assert process.Coords(3, 0) not in track
+
+
+def test_from_rows_matches_raw_track():
+    mine_cart_madness = process.MineCartMadness.from_rows(io.StringIO(ONE_PAIR_OF_CARTS + '\n'))
+    crash = next(iter(mine_cart_madness))
+    assert crash == process.Coords(x=7, y=3)
+    assert mine_cart_madness.track.keys() == process.MineCartMadness(ONE_PAIR_OF_CARTS).track.keys()
+
+
+def test_create_track_stores_about_a_byte_per_cell():
+    width, height = 1_000, 500
+    loop_top = '/' + '-' * (width - 2) + '\\'
+    loop_bottom = '\\' + '-' * (width - 2) + '/'
+
+    def rows():
+        for _ in range(height // 2):
+            yield loop_top
+            yield loop_bottom
+
+    tracemalloc.start()
+    try:
+        mine_cart_madness = process.MineCartMadness.from_rows(rows())
+        track_bytes, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(mine_cart_madness.track) == width * height
+    assert track_bytes < 1.2 * width * height
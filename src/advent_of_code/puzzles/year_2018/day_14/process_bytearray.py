@@ -0,0 +1,254 @@
+import collections
+import dataclasses
+import sys
+import timeit
+
+
+INITIAL_RECIPES = b'\x03\x07'
+INITIAL_CAPACITY = 1 << 16
+DIGITS = 10
+DEFAULT_PROGRESS_INTERVAL = 1 << 20
+
+
+def kmp_automaton(pattern):
+    """
+    Build the KMP automaton for a digit pattern as a flat transition table.
+
+    Each state is stored pre-multiplied by DIGITS, so the next state is table[state + digit] and a full match is
+    state == len(pattern) * DIGITS.
+    """
+    table = [0] * ((len(pattern) + 1) * DIGITS)
+    restart = 0
+    for state in range(len(pattern) + 1):
+        for digit in range(DIGITS):
+            table[state * DIGITS + digit] = table[restart * DIGITS + digit] if state else 0
+        if state < len(pattern):
+            table[state * DIGITS + pattern[state]] = (state + 1) * DIGITS
+            if state:
+                restart = table[restart * DIGITS + pattern[state]] // DIGITS
+    return table
+
+
+def aho_corasick_automaton(patterns):
+    """
+    Build the Aho-Corasick automaton for several digit patterns as a flat transition table.
+
+    States are pre-multiplied by DIGITS as in kmp_automaton. outputs[state] lists the indexes of every pattern that
+    ends on reaching state, including those found through suffix links, and is empty for every other state.
+    """
+    # trie, with 0 standing for a missing child since the root is never anyone's child
+    table = [0] * DIGITS
+    pattern_ends = [[]]
+    for pattern_no, pattern in enumerate(patterns):
+        state = 0
+        for digit in pattern:
+            if not table[state * DIGITS + digit]:
+                table[state * DIGITS + digit] = len(pattern_ends)
+                table.extend([0] * DIGITS)
+                pattern_ends.append([])
+            state = table[state * DIGITS + digit]
+        pattern_ends[state].append(pattern_no)
+
+    # breadth first, so a state's suffix link is complete before its children need it
+    suffix_links = [0] * len(pattern_ends)
+    queue = collections.deque(child for child in table[:DIGITS] if child)
+    while queue:
+        state = queue.popleft()
+        suffix_link = suffix_links[state]
+        for digit in range(DIGITS):
+            child = table[state * DIGITS + digit]
+            if child:
+                suffix_links[child] = table[suffix_link * DIGITS + digit]
+                pattern_ends[child] += pattern_ends[suffix_links[child]]
+                queue.append(child)
+            else:
+                table[state * DIGITS + digit] = table[suffix_link * DIGITS + digit]
+
+    outputs = [()] * len(table)
+    for state, pattern_nos in enumerate(pattern_ends):
+        outputs[state * DIGITS] = pattern_nos
+    return [state * DIGITS for state in table], outputs
+
+
+@dataclasses.dataclass(frozen=True)
+class SearchProgress:
+    recipes: int
+    patterns_remaining: int
+
+
+class ChocolateCharts:
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.recipes = bytearray(max(capacity, len(INITIAL_RECIPES)))
+        self.length = 0
+        self.elf_1_position = 0
+        self.elf_2_position = 0
+        self._reset()
+
+    def _reset(self):
+        self.recipes[:len(INITIAL_RECIPES)] = INITIAL_RECIPES
+        self.length = len(INITIAL_RECIPES)
+        self.elf_1_position = 0
+        self.elf_2_position = 1
+
+    def _grow(self):
+        self.recipes.extend(bytes(len(self.recipes)))
+
+    def score_part_1(self, score: int):
+        self._reset()
+        self._generate(stop_length=score + 10)
+        return ''.join(str(recipe) for recipe in self.recipes[score: score + 10])
+
+    def score_part_2(self, score: str):
+        self._reset()
+        pattern = [int(digit) for digit in score]
+        return self._generate(pattern=pattern) - len(pattern)
+
+    def score_part_2_batch(self, scores, stop_length=sys.maxsize):
+        search = self.search_part_2(scores, stop_length=stop_length)
+        while True:
+            try:
+                next(search)
+            except StopIteration as e:
+                return e.value
+
+    def search_part_2(self, scores, progress_interval=DEFAULT_PROGRESS_INTERVAL, stop_length=sys.maxsize):
+        """
+        Find where each score first appears in a single pass over the scoreboard.
+
+        Yields a SearchProgress every progress_interval recipes and once more at the end, and returns a dict of score
+        to the number of recipes to its left. Generation stops as soon as every score has been found, or once there
+        are stop_length recipes, in which case the scores not yet found are left out.
+        """
+        self._reset()
+        scores = list(dict.fromkeys(scores))
+        automaton, outputs = aho_corasick_automaton([[int(digit) for digit in score] for score in scores])
+        positions = {}
+
+        def record_matches(state, length):
+            for pattern_no in outputs[state]:
+                score = scores[pattern_no]
+                if score not in positions:
+                    positions[score] = length - len(score)
+            # every pattern ending here is now resolved, so the state can stop being checked
+            outputs[state] = ()
+
+        recipes = self.recipes
+        length = self.length
+        elf_1_position = self.elf_1_position
+        elf_2_position = self.elf_2_position
+
+        state = 0
+        for recipe in recipes[:length]:
+            state = automaton[state + recipe]
+        if outputs[state]:
+            record_matches(state, length)
+
+        next_progress = length + progress_interval
+        capacity = len(recipes) - 1
+        while len(positions) < len(scores) and length < stop_length:
+            if length >= capacity:
+                self._grow()
+                recipes = self.recipes
+                capacity = len(recipes) - 1
+            if length >= next_progress:
+                yield SearchProgress(length, len(scores) - len(positions))
+                next_progress += progress_interval
+            elf_1_recipe = recipes[elf_1_position]
+            elf_2_recipe = recipes[elf_2_position]
+            total = elf_1_recipe + elf_2_recipe
+            if total >= 10:
+                recipes[length] = 1
+                length += 1
+                state = automaton[state + 1]
+                if outputs[state]:
+                    record_matches(state, length)
+                total -= 10
+            recipes[length] = total
+            length += 1
+            state = automaton[state + total]
+            if outputs[state]:
+                record_matches(state, length)
+
+            elf_1_position += elf_1_recipe + 1
+            if elf_1_position >= length:
+                elf_1_position %= length
+            elf_2_position += elf_2_recipe + 1
+            if elf_2_position >= length:
+                elf_2_position %= length
+
+        self.length = length
+        self.elf_1_position = elf_1_position
+        self.elf_2_position = elf_2_position
+        yield SearchProgress(length, len(scores) - len(positions))
+        return positions
+
+    def _generate(self, stop_length=sys.maxsize, pattern=None):
+        """
+        Write recipes into the scoreboard until there are stop_length of them or until pattern has just been written.
+
+        Every digit is fed through the pattern's KMP automaton as it is written. The scoreboard doubles in capacity
+        whenever it fills up. A step that completes the pattern on its first digit still writes its second digit and
+        moves the elves, so generation can always resume from the saved state. Returns the number of recipes on the
+        scoreboard up to the end of the match, or when it stopped if there was none.
+        """
+        automaton = kmp_automaton(pattern) if pattern else [0] * DIGITS
+        match = len(pattern) * DIGITS if pattern else -1
+
+        recipes = self.recipes
+        length = self.length
+        elf_1_position = self.elf_1_position
+        elf_2_position = self.elf_2_position
+
+        state = 0
+        if pattern:
+            for recipe in recipes[:length]:
+                state = automaton[state + recipe]
+        match_length = length if state == match else None
+
+        # room for the two digits a step can write
+        capacity = len(recipes) - 1
+        while match_length is None and length < stop_length:
+            if length >= capacity:
+                self._grow()
+                recipes = self.recipes
+                capacity = len(recipes) - 1
+            elf_1_recipe = recipes[elf_1_position]
+            elf_2_recipe = recipes[elf_2_position]
+            total = elf_1_recipe + elf_2_recipe
+            if total >= 10:
+                recipes[length] = 1
+                length += 1
+                state = automaton[state + 1]
+                if state == match:
+                    match_length = length
+                total -= 10
+            recipes[length] = total
+            length += 1
+            state = automaton[state + total]
+            if state == match and match_length is None:
+                match_length = length
+
+            elf_1_position += elf_1_recipe + 1
+            if elf_1_position >= length:
+                elf_1_position %= length
+            elf_2_position += elf_2_recipe + 1
+            if elf_2_position >= length:
+                elf_2_position %= length
+
+        self.length = length
+        self.elf_1_position = elf_1_position
+        self.elf_2_position = elf_2_position
+        return length if match_length is None else match_length
+
+
+def main():
+    with open("input.txt") as f:
+        number_of_recipes = f.read().rstrip()
+    chocolate_charts = ChocolateCharts()
+    print('Score part 1:', chocolate_charts.score_part_1(int(number_of_recipes)))
+    print('Score part 2:', chocolate_charts.score_part_2(number_of_recipes))
+
+
+if __name__ == "__main__":
+    print(f"Completed in {timeit.timeit(main, number=1)} seconds")
@@ -0,0 +1,210 @@
+import argparse
+import contextlib
+import fcntl
+import json
+import mmap
+import os
+import timeit
+
+import numpy as np
+
+from advent_of_code.puzzles.year_2018.day_14 import process_bytearray
+
+
+DEFAULT_CACHE_DIR = '.scoreboard_cache'
+DEFAULT_MAX_INDEXED_DIGITS = 6
+MIN_EXTENSION = 1 << 20
+INDEX_CHUNK_SIZE = 1 << 20
+NOT_SEEN = -1
+
+DATA_FILE = 'scoreboard.bin'
+META_FILE = 'scoreboard.json'
+LOCK_FILE = 'scoreboard.lock'
+INDEX_FILE = 'first_{}.idx'
+
+
+class ScoreboardCache(process_bytearray.ChocolateCharts):
+    """
+    Scoreboard kept in a memory-mapped file that any process can open, extend and query.
+
+    The file holds one byte per recipe and is only ever appended to, so recipes below the saved length never change.
+    Generation resumes from the saved length and elf positions. For every pattern length up to max_indexed_digits, an
+    index file maps each k-digit pattern to the position it first occurs at, so repeated queries are a lookup.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_indexed_digits=DEFAULT_MAX_INDEXED_DIGITS):
+        self.directory = directory
+        self.max_indexed_digits = max_indexed_digits
+        self.indexed = {}
+        self._indexes = {}
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(self._path(LOCK_FILE), 'a+b')
+        with self._locked():
+            if not os.path.exists(self._path(META_FILE)):
+                self._create()
+        self._data_file = open(self._path(DATA_FILE), 'r+b')
+        self.recipes = mmap.mmap(self._data_file.fileno(), 0)
+        self._load_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        for index in self._indexes.values():
+            index.flush()
+        self._indexes.clear()
+        self.recipes.close()
+        self._data_file.close()
+        self._lock_file.close()
+
+    def score_part_1(self, score: int):
+        self.extend(score + 10)
+        return ''.join(str(recipe) for recipe in self.recipes[score: score + 10])
+
+    def score_part_2(self, score: str):
+        pattern = bytes(int(digit) for digit in score)
+        while (position := self.first_occurrence(pattern)) is None:
+            self.extend(max(2 * self.length, self.length + MIN_EXTENSION))
+        return position
+
+    def extend(self, length):
+        """
+        Make sure at least length recipes are on the scoreboard, generating only the ones no process has saved yet.
+        """
+        if self.length >= length:
+            return
+        with self._locked():
+            self._load_meta()
+            if self.length >= length:
+                return
+            self._generate(stop_length=length)
+            self.recipes.flush()
+            self._save_meta()
+
+    def first_occurrence(self, pattern):
+        """
+        Return the position pattern is first written at on the scoreboard generated so far, or None if it is not there.
+
+        Like ChocolateCharts, a match must end after the initial recipes have been written.
+        """
+        if len(pattern) > self.max_indexed_digits:
+            start = max(len(process_bytearray.INITIAL_RECIPES) - len(pattern), 0)
+            position = self.recipes.find(pattern, start, self.length)
+            return None if position == -1 else position
+        self._update_index(len(pattern))
+        position = int(self._indexes[len(pattern)][_pattern_value(pattern)])
+        return None if position == NOT_SEEN else position
+
+    def _update_index(self, k):
+        if k in self._indexes and self.indexed.get(k, 0) >= self.length:
+            return
+        with self._locked():
+            self._load_meta()
+            index = self._index(k)
+            indexed = self.indexed.get(k, 0)
+            if indexed >= self.length:
+                return
+            # windows ending at indexed or before are already in the index
+            start = max(indexed - k + 1, len(process_bytearray.INITIAL_RECIPES) - k, 0)
+            digits = np.frombuffer(self.recipes, dtype=np.uint8, count=self.length)
+            try:
+                for chunk_start in range(start, self.length - k + 1, INDEX_CHUNK_SIZE):
+                    chunk_end = min(chunk_start + INDEX_CHUNK_SIZE, self.length - k + 1)
+                    values = np.zeros(chunk_end - chunk_start, dtype=np.int64)
+                    for digit in range(k):
+                        values *= 10
+                        values += digits[chunk_start + digit:chunk_end + digit]
+                    # chunks are scanned in order, so only values not seen in an earlier chunk are new
+                    positions = np.flatnonzero(index[values] == NOT_SEEN)
+                    values, first_positions = np.unique(values[positions], return_index=True)
+                    index[values] = positions[first_positions] + chunk_start
+            finally:
+                # the scoreboard map cannot be resized while a view of it is alive
+                del digits
+            index.flush()
+            self.indexed[k] = self.length
+            self._save_meta()
+
+    def _index(self, k):
+        if k not in self._indexes:
+            path = self._path(INDEX_FILE.format(k))
+            if os.path.exists(path):
+                self._indexes[k] = np.memmap(path, dtype=np.int64, mode='r+', shape=(10 ** k,))
+            else:
+                index = np.memmap(path, dtype=np.int64, mode='w+', shape=(10 ** k,))
+                index[:] = NOT_SEEN
+                self._indexes[k] = index
+                self.indexed.pop(k, None)
+        return self._indexes[k]
+
+    def _grow(self):
+        self.recipes.resize(2 * len(self.recipes))
+
+    def _create(self):
+        with open(self._path(DATA_FILE), 'wb') as f:
+            f.write(process_bytearray.INITIAL_RECIPES)
+            f.truncate(process_bytearray.INITIAL_CAPACITY)
+        self.length = len(process_bytearray.INITIAL_RECIPES)
+        self.elf_1_position = 0
+        self.elf_2_position = 1
+        self._save_meta()
+
+    def _load_meta(self):
+        with open(self._path(META_FILE)) as f:
+            meta = json.load(f)
+        self.length = meta['length']
+        self.elf_1_position = meta['elf_1_position']
+        self.elf_2_position = meta['elf_2_position']
+        self.indexed = {int(k): indexed for k, indexed in meta['indexed'].items()}
+        if os.fstat(self._data_file.fileno()).st_size != len(self.recipes):
+            # another process has grown the file
+            self.recipes.close()
+            self.recipes = mmap.mmap(self._data_file.fileno(), 0)
+
+    def _save_meta(self):
+        meta = {
+            'length': self.length,
+            'elf_1_position': self.elf_1_position,
+            'elf_2_position': self.elf_2_position,
+            'indexed': {str(k): indexed for k, indexed in self.indexed.items()},
+        }
+        tmp_path = self._path(META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path(META_FILE))
+
+    @contextlib.contextmanager
+    def _locked(self):
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+
+def _pattern_value(pattern):
+    value = 0
+    for digit in pattern:
+        value = value * 10 + digit
+    return value
+
+
+def main(cache_dir=DEFAULT_CACHE_DIR):
+    with open("input.txt") as f:
+        number_of_recipes = f.read().rstrip()
+    with ScoreboardCache(cache_dir) as scoreboard_cache:
+        print('Score part 1:', scoreboard_cache.score_part_1(int(number_of_recipes)))
+        print('Score part 2:', scoreboard_cache.score_part_2(number_of_recipes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='directory the scoreboard is cached in')
+    args = parser.parse_args()
+    print(f"Completed in {timeit.timeit(lambda: main(args.cache_dir), number=1)} seconds")
@@ -1,4 +1,10 @@
+import random
+
+import pytest
+
 from advent_of_code.puzzles.year_2018.day_14 import process
+from advent_of_code.puzzles.year_2018.day_14 import process_bytearray
+from advent_of_code.puzzles.year_2018.day_14 import scoreboard_cache
 
 
 class TestPart1:
@@ -39,3 +45,120 @@ class TestPart2:
     def test_check_after_scoreboard_extends_by_2(self):
         chocolate_charts = process.ChocolateCharts()
         assert chocolate_charts.score_part_2('15891') == 10
+
+
+@pytest.mark.parametrize('score, expected', [(9, '5158916779'), (5, '0124515891'), (18, '9251071085'), (2018, '5941429882')])
+def test_bytearray_part_1(score, expected):
+    chocolate_charts = process_bytearray.ChocolateCharts(capacity=4)
+    assert chocolate_charts.score_part_1(score) == expected
+
+
+@pytest.mark.parametrize('score, expected', [
+    ('51589', 9), ('01245', 5), ('92510', 18), ('59414', 2018), ('15891', 10), ('37', 0), ('7', 1), ('3', 52),
+])
+def test_bytearray_part_2(score, expected):
+    chocolate_charts = process_bytearray.ChocolateCharts(capacity=4)
+    assert chocolate_charts.score_part_2(score) == expected
+
+
+def test_bytearray_generation_resumes_after_match_on_first_digit_of_step():
+    # the first step writes 1 then 0, and the pattern completes on the 1
+    chocolate_charts = process_bytearray.ChocolateCharts(capacity=4)
+    assert chocolate_charts.score_part_2('371') == 0
+    chocolate_charts._generate(stop_length=100)
+
+    fresh_chocolate_charts = process_bytearray.ChocolateCharts(capacity=4)
+    fresh_chocolate_charts._generate(stop_length=100)
+    assert chocolate_charts.length == fresh_chocolate_charts.length
+    assert chocolate_charts.recipes[:100] == fresh_chocolate_charts.recipes[:100]
+
+
+def test_bytearray_part_2_agrees_on_random_patterns():
+    rng = random.Random(0)
+    chocolate_charts = process.ChocolateCharts()
+    bytearray_chocolate_charts = process_bytearray.ChocolateCharts()
+    for _ in range(30):
+        score = ''.join(rng.choice('0123456789') for _ in range(rng.randint(1, 4)))
+        assert bytearray_chocolate_charts.score_part_2(score) == chocolate_charts.score_part_2(score)
+
+
+def test_kmp_automaton_finds_overlapping_prefix():
+    automaton = process_bytearray.kmp_automaton([1, 1, 2])
+    state = 0
+    for position, digit in enumerate([1, 1, 1, 2]):
+        state = automaton[state + digit]
+    assert state == 3 * process_bytearray.DIGITS
+
+
+@pytest.mark.parametrize('score, expected', [
+    ('51589', 9), ('01245', 5), ('92510', 18), ('59414', 2018), ('15891', 10), ('37', 0), ('7', 1), ('3', 52),
+    ('5941429882', 2018),
+])
+def test_scoreboard_cache_part_2(tmp_path, score, expected):
+    with scoreboard_cache.ScoreboardCache(tmp_path, max_indexed_digits=5) as cache:
+        assert cache.score_part_2(score) == expected
+
+
+def test_scoreboard_cache_is_reused(tmp_path):
+    with scoreboard_cache.ScoreboardCache(tmp_path) as cache:
+        assert cache.score_part_1(2018) == '5941429882'
+        assert cache.score_part_2('59414') == 2018
+        length = cache.length
+    with scoreboard_cache.ScoreboardCache(tmp_path) as cache:
+        assert cache.length == length
+        assert cache.indexed == {5: length}
+        assert cache.score_part_1(9) == '5158916779'
+        assert cache.score_part_2('51589') == 9
+        assert cache.length == length
+
+
+def test_scoreboard_cache_extends_where_it_left_off(tmp_path):
+    with scoreboard_cache.ScoreboardCache(tmp_path) as cache:
+        cache.extend(1000)
+    with scoreboard_cache.ScoreboardCache(tmp_path) as cache:
+        assert cache.score_part_1(5000) == process.ChocolateCharts().score_part_1(5000)
+
+
+def test_bytearray_part_2_batch():
+    chocolate_charts = process_bytearray.ChocolateCharts(capacity=4)
+    scores = ['51589', '01245', '92510', '59414', '15891', '37', '7', '3', '5941429882', '51589']
+    assert chocolate_charts.score_part_2_batch(scores) == {
+        '51589': 9, '01245': 5, '92510': 18, '59414': 2018, '15891': 10, '37': 0, '7': 1, '3': 52, '5941429882': 2018,
+    }
+
+
+def test_bytearray_part_2_batch_agrees_on_random_patterns():
+    rng = random.Random(0)
+    scores = [''.join(rng.choice('0123456789') for _ in range(rng.randint(1, 3))) for _ in range(100)]
+    positions = process_bytearray.ChocolateCharts().score_part_2_batch(scores)
+    chocolate_charts = process_bytearray.ChocolateCharts()
+    assert positions == {score: chocolate_charts.score_part_2(score) for score in scores}
+
+
+def test_bytearray_search_part_2_streams_progress():
+    search = process_bytearray.ChocolateCharts().search_part_2(
+        ['59414', '1234567890'], progress_interval=500, stop_length=2000
+    )
+    progress = []
+    while True:
+        try:
+            progress.append(next(search))
+        except StopIteration as e:
+            positions = e.value
+            break
+    assert positions == {}
+    assert [p.patterns_remaining for p in progress] == [2, 2, 2, 2]
+    assert progress[-1].recipes >= 2000
+
+    search = process_bytearray.ChocolateCharts().search_part_2(['59414', '51589'], progress_interval=500)
+    assert [p.patterns_remaining for p in search] == [1, 1, 1, 1, 0]
+
+
+def test_aho_corasick_automaton_reports_suffix_patterns():
+    automaton, outputs = process_bytearray.aho_corasick_automaton([[1, 2, 3], [2, 3], [3, 1]])
+    state = 0
+    matches = []
+    for position, digit in enumerate([1, 2, 3, 1]):
+        state = automaton[state + digit]
+        matches.append(sorted(outputs[state]))
+    assert matches == [[], [], [0, 1], [2]]
@@ -0,0 +1,328 @@
+import argparse
+import collections
+import json
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+
+from advent_of_code.puzzles.year_2018.day_15 import process
+from advent_of_code.puzzles.year_2018.day_15 import process_array
+from advent_of_code.puzzles.year_2018.day_15 import process_fields
+
+
+ENGINES = {
+    'process': process.ElfGoblinCombat,
+    'process_array': process_array.ElfGoblinCombat,
+    'process_fields': process_fields.ElfGoblinCombat,
+}
+
+# the sample caves from the puzzle
+SAMPLE_CAVES = {
+    'sample_1': """\
+#######
+#.G...#
+#...EG#
+#.#.#G#
+#..G#E#
+#.....#
+#######""",
+    'sample_2': """\
+#######
+#G..#E#
+#E#E.E#
+#G.##.#
+#...#E#
+#...E.#
+#######""",
+    'sample_3': """\
+#######
+#E..EG#
+#.#G.E#
+#E.##E#
+#G..#.#
+#..E#.#
+#######""",
+    'sample_4': """\
+#######
+#E.G#.#
+#.#G..#
+#G.#.G#
+#G..#.#
+#...E.#
+#######""",
+    'sample_5': """\
+#######
+#.E...#
+#.#..G#
+#.###.#
+#E#G#G#
+#...#G#
+#######""",
+    'sample_6': """\
+#########
+#G......#
+#.E.#...#
+#..##..G#
+#...##..#
+#...#...#
+#.G...G.#
+#.....G.#
+#########""",
+}
+
+# name -> (width, height, units, seed)
+GENERATED_CAVES = {
+    'cave_32': (32, 32, 30, 0),
+    'cave_64': (64, 64, 60, 1),
+    'cave_128': (128, 128, 120, 2),
+}
+
+# the original engine keeps its cave in a dict, so it is only timed on the smaller caves
+MAX_PROCESS_CELLS = 32 * 33
+# the attack power search runs a combat per trial, so it is only timed on the smaller caves
+MAX_SEARCH_CELLS = 32 * 33
+MAX_ROUNDS = 1_000
+# combat state stops growing once the pathfinding structures are built, so memory is only traced for the first rounds
+MEMORY_ROUNDS = 50
+
+DEFAULT_THRESHOLD = 0.2
+SNAPSHOT_REPEAT = 100
+
+
+def generate_cave(width, height, units, wall_fraction=0.2, seed=0):
+    """
+    Generate a cave walled in on all sides with walls scattered through it and units dropped on random open squares.
+
+    Units are only dropped in the largest connected open area, so every unit can reach every other one and the combat
+    ends.
+    """
+    rng = random.Random(seed)
+    grid = [[process.Map.WALL.value] * width for _ in range(height)]
+    for y in range(1, height - 1):
+        for x in range(1, width - 1):
+            grid[y][x] = process.Map.WALL.value if rng.random() < wall_fraction else process.Map.CAVERN.value
+    for x, y in rng.sample(sorted(_largest_area(grid)), units):
+        grid[y][x] = rng.choice([process.Map.ELF.value, process.Map.GOBLIN.value])
+    return '\n'.join(''.join(row) for row in grid)
+
+
+def _largest_area(grid):
+    seen = set()
+    largest_area = set()
+    for y, row in enumerate(grid):
+        for x, space in enumerate(row):
+            if space != process.Map.CAVERN.value or (x, y) in seen:
+                continue
+            area = {(x, y)}
+            queue = collections.deque([(x, y)])
+            while queue:
+                square_x, square_y = queue.popleft()
+                for direction in process.DIRECTIONS.values():
+                    adj_x, adj_y = square_x + direction.x, square_y + direction.y
+                    if (adj_x, adj_y) not in area and grid[adj_y][adj_x] == process.Map.CAVERN.value:
+                        area.add((adj_x, adj_y))
+                        queue.append((adj_x, adj_y))
+            seen |= area
+            if len(area) > len(largest_area):
+                largest_area = area
+    return largest_area
+
+
+def caves():
+    """
+    Return the benchmark corpus as name -> cave.
+    """
+    corpus = dict(SAMPLE_CAVES)
+    for name, (width, height, units, seed) in GENERATED_CAVES.items():
+        corpus[name] = generate_cave(width, height, units, seed=seed)
+    return corpus
+
+
+def _peak_memory(function, *args):
+    # tracemalloc slows Python down several times over, so memory is measured on a separate run from the timings
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _combat(engine, input_, max_rounds):
+    elf_goblin_combat = ENGINES[engine].read_input(input_)
+    elf_goblin_combat.pathfinding_nodes = []
+    combat_gen = elf_goblin_combat.combat()
+    try:
+        for _ in range(max_rounds):
+            next(combat_gen)
+    except StopIteration as e:
+        return elf_goblin_combat, e.value.outcome
+    return elf_goblin_combat, None
+
+
+def run_combat(engine, input_, max_rounds=MAX_ROUNDS):
+    """
+    Return the outcome of a combat with one engine, with its rounds per second, pathfinding nodes per turn that looked
+    for a step, and peak memory in bytes over the first MEMORY_ROUNDS rounds.
+
+    The outcome is None if the combat has not ended after max_rounds.
+    """
+    start = time.perf_counter()
+    elf_goblin_combat, outcome = _combat(engine, input_, max_rounds)
+    seconds = time.perf_counter() - start
+    pathfinding_nodes = elf_goblin_combat.pathfinding_nodes
+    return {
+        'outcome': outcome,
+        'rounds': elf_goblin_combat.round_no,
+        'seconds': seconds,
+        'rounds_per_second': elf_goblin_combat.round_no / seconds,
+        'nodes_per_turn': sum(pathfinding_nodes) / len(pathfinding_nodes) if pathfinding_nodes else 0,
+        'peak_memory': _peak_memory(_combat, engine, input_, min(max_rounds, MEMORY_ROUNDS)),
+    }
+
+
+def _search(engine, input_):
+    return process.VariableElfAttackPower(input_, ENGINES[engine]).search()
+
+
+def run_search(engine, input_):
+    """
+    Return the attack power and outcome VariableElfAttackPower.search finds with one engine, with the seconds and peak
+    memory in bytes it takes and what its snapshots cost.
+    """
+    start = time.perf_counter()
+    attack, summary = _search(engine, input_)
+    seconds = time.perf_counter() - start
+    snapshot_size, snapshot_seconds, restore_seconds, common_round = measure_snapshots(engine, input_)
+    return {
+        'attack': attack,
+        'outcome': summary.outcome,
+        'seconds': seconds,
+        'peak_memory': _peak_memory(_search, engine, input_),
+        'snapshot_size': snapshot_size,
+        'snapshot_seconds': snapshot_seconds,
+        'restore_seconds': restore_seconds,
+        'common_round': common_round,
+    }
+
+
+def measure_snapshots(engine, input_, repeat=SNAPSHOT_REPEAT):
+    """
+    Return the pickled size of a snapshot in bytes and the seconds a snapshot and a restore take, at the start of the
+    round the first elf attack lands in, along with that round number.
+    """
+    common_combat = process.VariableElfAttackPower(input_, ENGINES[engine]).common_combat()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        snapshot = common_combat.snapshot()
+    snapshot_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        common_combat.restore(snapshot)
+    restore_seconds = (time.perf_counter() - start) / repeat
+
+    size = len(pickle.dumps(snapshot))
+    return size, snapshot_seconds, restore_seconds, snapshot.round_no
+
+
+def run(engines=tuple(ENGINES), corpus=None):
+    """
+    Generate the results of every benchmark as ('cave/engine/combat' or 'cave/engine/search', measurements).
+    """
+    if corpus is None:
+        corpus = caves()
+    for name, input_ in corpus.items():
+        for engine in engines:
+            if engine == 'process' and len(input_) > MAX_PROCESS_CELLS:
+                continue
+            yield f'{name}/{engine}/combat', run_combat(engine, input_)
+            if len(input_) <= MAX_SEARCH_CELLS:
+                yield f'{name}/{engine}/search', run_search(engine, input_)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Return a description of each regression in results against the baseline results.
+
+    A different outcome or attack power is always a regression. So is rounds per second dropping, or search seconds or
+    peak memory growing, by more than threshold as a fraction of the baseline.
+    """
+    regressions = []
+    for key, measurements in results.items():
+        if key not in baseline:
+            continue
+        baseline_measurements = baseline[key]
+        for answer in ('outcome', 'attack'):
+            if answer in measurements and measurements[answer] != baseline_measurements[answer]:
+                regressions.append(f'{key}: {answer} {measurements[answer]} was {baseline_measurements[answer]}')
+        if 'rounds_per_second' in measurements:
+            if measurements['rounds_per_second'] < baseline_measurements['rounds_per_second'] * (1 - threshold):
+                regressions.append(
+                    f"{key}: {measurements['rounds_per_second']:.1f} rounds per second "
+                    f"was {baseline_measurements['rounds_per_second']:.1f}"
+                )
+        elif measurements['seconds'] > baseline_measurements['seconds'] * (1 + threshold):
+            regressions.append(
+                f"{key}: {measurements['seconds']:.3f} seconds was {baseline_measurements['seconds']:.3f}"
+            )
+        if measurements['peak_memory'] > baseline_measurements['peak_memory'] * (1 + threshold):
+            regressions.append(
+                f"{key}: peak memory {measurements['peak_memory']} bytes "
+                f"was {baseline_measurements['peak_memory']} bytes"
+            )
+    return regressions
+
+
+def report(key, measurements):
+    if 'rounds_per_second' in measurements:
+        print(
+            f"{key:>30}: {measurements['rounds']} rounds, {measurements['rounds_per_second']:.1f} rounds per "
+            f"second, {measurements['nodes_per_turn']:.1f} nodes per turn, "
+            f"peak memory {measurements['peak_memory'] / 1024 ** 2:.2f} MiB, outcome {measurements['outcome']}"
+        )
+    else:
+        print(
+            f"{key:>30}: {measurements['seconds']:.3f} seconds, "
+            f"peak memory {measurements['peak_memory'] / 1024 ** 2:.2f} MiB, attack {measurements['attack']}, "
+            f"outcome {measurements['outcome']}, snapshot {measurements['snapshot_size']} bytes, "
+            f"{measurements['snapshot_seconds'] * 1e6:.0f} us to take, "
+            f"{measurements['restore_seconds'] * 1e6:.0f} us to restore"
+        )
+
+
+def main(engines=tuple(ENGINES), save=None, baseline=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Run and report every benchmark, returning False if any regressed against the baseline JSON file.
+    """
+    results = {}
+    for key, measurements in run(engines):
+        report(key, measurements)
+        results[key] = measurements
+    if save is not None:
+        with open(save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if baseline is None:
+        return True
+    with open(baseline) as f:
+        regressions = compare(results, json.load(f), threshold)
+    for regression in regressions:
+        print(f'Regression: {regression}')
+    return not regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--engine', action='append', choices=ENGINES, help='engine to run, all of them by default')
+    parser.add_argument('--save', help='JSON file to save the results to')
+    parser.add_argument('--compare', help='JSON file of earlier results to check for regressions against')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='fraction rounds per second, search seconds or peak memory can worsen by before it is a regression',
+    )
+    args = parser.parse_args()
+    sys.exit(0 if main(args.engine or tuple(ENGINES), args.save, args.compare, args.threshold) else 1)
@@ -1,6 +1,12 @@
+import argparse
 import collections
+import concurrent.futures
+import copy
 import dataclasses
 import enum
+import itertools
+import multiprocessing
+import sys
 import timeit
 import typing
 
@@ -13,11 +19,6 @@ class Coords:
     def __add__(self, other):
         return Coords(self.x + other.x, self.y + other.y)
 
-@dataclasses.dataclass(frozen=True)
-class Path:
-    path: list
-    coord: Coords
-
 
 class Map(enum.Enum):
     CAVERN = '.'
@@ -30,6 +31,9 @@ class Map(enum.Enum):
 class Unit:
     unit_type: Map
     hit_points: int = 200
+    # set when the unit joins a combat's roster
+    unit_id: typing.Optional[int] = dataclasses.field(default=None, compare=False, repr=False)
+    position: typing.Optional[Coords] = dataclasses.field(default=None, compare=False, repr=False)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -51,6 +55,58 @@ DIRECTIONS = {
 
 DEFAULT_ATTACK_POWER = 3
 
+SPACE_CODES = {ord(space.value): space for space in Map}
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """
+    Combat state between two rounds.
+
+    spaces holds one byte per square, and hit_points the hit points of each unit in the order their squares come in.
+    Attack powers are not part of the state, so a snapshot can be restored into a combat with any elf attack power.
+    """
+    spaces: bytes
+    hit_points: tuple[int, ...]
+    round_no: int
+    first_elf_death: bool
+    elf_attacked: bool
+
+
+def encode_spaces(spaces):
+    codes = bytearray()
+    hit_points = []
+    for space in spaces:
+        if isinstance(space, Unit):
+            codes.append(ord(space.unit_type.value))
+            hit_points.append(space.hit_points)
+        else:
+            codes.append(ord(space.value))
+    return bytes(codes), tuple(hit_points)
+
+
+def decode_spaces(spaces, hit_points):
+    hit_points = iter(hit_points)
+    for code in spaces:
+        space = SPACE_CODES[code]
+        if space in (Map.ELF, Map.GOBLIN):
+            yield Unit(space, next(hit_points))
+        else:
+            yield space
+
+
+def parse_grid(input_):
+    grid = {}
+    for y, line in enumerate(input_.split('\n')):
+        for x, space in enumerate(line):
+            space_enum = Map(space)
+            if space_enum in (Map.ELF, Map.GOBLIN):
+                grid_space = Unit(space_enum)
+            else:
+                grid_space = space_enum
+            grid[Coords(x, y)] = grid_space
+    return grid
+
 
 class ElfGoblinCombat:
 
@@ -60,6 +116,13 @@ class ElfGoblinCombat:
         self._elf_attack = elf_attack
         self._goblin_attack = DEFAULT_ATTACK_POWER
         self._first_elf_death = False
+        self._elf_attacked = False
+        self.round_no = 0
+        self._width = max(coord.x for coord in grid) + 1
+        self._height = max(coord.y for coord in grid) + 1
+        self._enrol_units()
+        # set to a list to record the number of squares each _choose_step search expands
+        self.pathfinding_nodes = None
 
     @staticmethod
     def read_file():
@@ -68,16 +131,7 @@ class ElfGoblinCombat:
 
     @classmethod
     def read_input(cls, input_, elf_attack=DEFAULT_ATTACK_POWER):
-        grid = {}
-        for y, line in enumerate(input_.split('\n')):
-            for x, space in enumerate(line):
-                space_enum = Map(space)
-                if space_enum in (Map.ELF, Map.GOBLIN):
-                    grid_space = Unit(space_enum)
-                else:
-                    grid_space = space_enum
-                grid[Coords(x, y)] = grid_space
-        return cls(grid, elf_attack)
+        return cls(parse_grid(input_), elf_attack)
 
     def _grid_unparse(self):
         full_grid = self.grid | self.grid_walls
@@ -100,8 +154,42 @@ class ElfGoblinCombat:
         grid_repr = '\n'.join([''.join(row) for row in raw_grid_repr])
         return grid_repr
 
+    def _enrol_units(self):
+        # unit id -> living unit; units leave the roster as they die
+        self.roster = {}
+        self._units_alive = {Map.ELF: 0, Map.GOBLIN: 0}
+        for coord, space in self.grid.items():
+            if isinstance(space, Unit):
+                space.unit_id = len(self.roster)
+                space.position = coord
+                self.roster[space.unit_id] = space
+                self._units_alive[space.unit_type] += 1
+
+    def snapshot(self):
+        spaces, hit_points = encode_spaces(self.grid.values())
+        return Snapshot(spaces, hit_points, self.round_no, self._first_elf_death, self._elf_attacked)
+
+    def restore(self, snapshot):
+        # squares never change order, so the snapshot's spaces line up with the grid's keys
+        self.grid = dict(zip(self.grid, decode_spaces(snapshot.spaces, snapshot.hit_points)))
+        self._enrol_units()
+        self.round_no = snapshot.round_no
+        self._first_elf_death = snapshot.first_elf_death
+        self._elf_attacked = snapshot.elf_attacked
+
+    def fork(self, elf_attack=None):
+        """
+        Return a copy of the combat in its current state that shares no units with it, optionally with a new elf attack
+        power.
+        """
+        forked = copy.copy(self)
+        forked.restore(self.snapshot())
+        forked.pathfinding_nodes = None
+        if elf_attack is not None:
+            forked._elf_attack = elf_attack
+        return forked
+
     def combat(self, break_at_first_elf_death=False):
-        round_no = 0
         while True:
             win = self.round()
             if break_at_first_elf_death and self._first_elf_death:
@@ -109,26 +197,26 @@ class ElfGoblinCombat:
             elif win:
                 hit_points = self._hit_points()
                 return Summary(
-                    round_no,
+                    self.round_no,
                     hit_points,
-                    outcome=round_no * hit_points,
+                    outcome=self.round_no * hit_points,
                     map=self._grid_unparse(),
                     grid=self.grid,
                 )
             else:
-                round_no += 1
+                self.round_no += 1
                 yield
 
     def round(self):
         """
         Return True if game is won before all turns are complete. Return False if full round occurs.
         """
-        units = [unit_coord for unit_coord, space in self.grid.items() if isinstance(space, Unit)]
-        for unit_coord in units:
-            if isinstance(self.grid[unit_coord], Unit):     # check unit did not die earlier in the round
+        units = sorted(self.roster.values(), key=lambda unit: (unit.position.y, unit.position.x))
+        for unit in units:
+            if unit.hit_points > 0:     # check unit did not die earlier in the round
                 if self._win_condition():  # one team won before a full round
                     return True
-                self.turn(unit_coord)
+                self.turn(unit.position)
         return False
 
     def turn(self, unit_coord):
@@ -155,37 +243,61 @@ class ElfGoblinCombat:
         return adj_targets
 
     def _choose_step(self, unit_coord):
+        """
+        Breadth-first search from the unit, returning the first step towards the first open square found next to an
+        enemy.
+
+        Squares are indexed y * width + x, so the visited set is a flat bitmap and each square found keeps a pointer
+        to the square it was reached from, which is followed back to recover the first step.
+        """
         unit = self.grid[unit_coord]
         if not isinstance(unit, Unit):
             raise ValueError('Space is not a type of unit')
-        visited = [unit_coord]
-        queue = collections.deque([Path(path=[], coord=unit_coord)])
-        while queue:
-            path = queue.popleft()
-            adj_coords = self._adj_coords(path.coord)
-            for adj_coord in adj_coords:
-                if adj_coord in visited:
+        width = self._width
+        visited = bytearray(width * self._height)
+        parents = [None] * (width * self._height)
+        visited[unit_coord.y * width + unit_coord.x] = 1
+        queue = collections.deque([unit_coord])
+        nodes_expanded = 0
+        in_range = None
+        while queue and in_range is None:
+            coord = queue.popleft()
+            nodes_expanded += 1
+            for adj_coord in self._adj_coords(coord):
+                adj_index = adj_coord.y * width + adj_coord.x
+                if visited[adj_index]:
                     continue
-                visited.append(adj_coord)
-                adj_space = self.grid[adj_coord]
-                if adj_space != Map.CAVERN:
+                visited[adj_index] = 1
+                if self.grid[adj_coord] != Map.CAVERN:
                     continue
-                next_path = Path(path=path.path.copy() + [adj_coord], coord=adj_coord)
-                queue.append(next_path)
-                adj_adj_coords = self._adj_coords(adj_coord)
-                for adj_adj_coord in adj_adj_coords:
-                    adj_adj_space = self.grid[adj_adj_coord]
-                    if isinstance(adj_adj_space, Unit) and unit.unit_type != adj_adj_space.unit_type:
-                        # if adjacent space is an enemy
-                        return next_path.path[0]
-        return None
+                parents[adj_index] = coord
+                queue.append(adj_coord)
+                if self._is_next_to_enemy(adj_coord, unit.unit_type):
+                    in_range = adj_coord
+                    break
+        if self.pathfinding_nodes is not None:
+            self.pathfinding_nodes.append(nodes_expanded)
+        if in_range is None:
+            return None
+        step = in_range
+        while (parent := parents[step.y * width + step.x]) != unit_coord:
+            step = parent
+        return step
+
+    def _is_next_to_enemy(self, coord, unit_type):
+        for adj_coord in self._adj_coords(coord):
+            adj_space = self.grid[adj_coord]
+            if isinstance(adj_space, Unit) and unit_type != adj_space.unit_type:
+                return True
+        return False
 
     def _move(self, unit_coord):
-        unit_type = self.grid[unit_coord]
+        unit = self.grid[unit_coord]
         chosen_step = self._choose_step(unit_coord)
         if chosen_step:
             self.grid[unit_coord] = Map.CAVERN
-            self.grid[chosen_step] = unit_type
+            self.grid[chosen_step] = unit
+            unit.position = chosen_step
             return chosen_step
         else:
             return unit_coord
@@ -205,9 +317,12 @@ class ElfGoblinCombat:
             target.hit_points -= self._goblin_attack
         elif target.unit_type == Map.GOBLIN:
             target.hit_points -= self._elf_attack
+            self._elf_attacked = True
         if target.hit_points <= 0:
             # target is dead
             self.grid[target_coord] = Map.CAVERN
+            del self.roster[target.unit_id]
+            self._units_alive[target.unit_type] -= 1
             if target.unit_type == Map.ELF:
                 self._first_elf_death = True
 
@@ -228,30 +343,87 @@ class ElfGoblinCombat:
         return in_range
 
     def _win_condition(self):
-        units = [space for space in self.grid.values() if isinstance(space, Unit)]
-        unit_types = [unit.unit_type for unit in units]
-        if len(set(unit_types)) == 1:
-            # all of one type died
-            return True
-        return False
+        # all of one type died
+        return not self._units_alive[Map.ELF] or not self._units_alive[Map.GOBLIN]
 
     def _hit_points(self):
-        units = [space for space in self.grid.values() if isinstance(space, Unit)]
-        hit_points = sum(unit.hit_points for unit in units)
-        return hit_points
+        return sum(unit.hit_points for unit in self.roster.values())
+
+
+@dataclasses.dataclass(frozen=True)
+class Probe:
+    """
+    Elf attack power the search needs a result for next, with the range of attack powers it can still ask about.
+
+    high is None while the search is still looking for an attack power the elves win with.
+    """
+    attack: int
+    low: int
+    high: typing.Optional[int]
+
+
+# shared with the trial workers of a parallel search
+_trial_combat = None
+_trial_low = None
+_trial_high = None
+
+
+def _init_trial_worker(combat_cls, input_, snapshot, low, high):
+    global _trial_combat, _trial_low, _trial_high
+    _trial_combat = combat_cls.read_input(input_)
+    _trial_combat.restore(snapshot)
+    _trial_low = low
+    _trial_high = high
+
+
+def _run_trial(elf_attack):
+    """
+    Run one combat of a parallel search, returning None if the search stops needing it before it finishes.
+    """
+    combat_gen = _trial_combat.fork(elf_attack).combat(break_at_first_elf_death=True)
+    try:
+        while True:
+            next(combat_gen)
+            if not _trial_low.value <= elf_attack <= _trial_high.value:
+                return None
+    except StopIteration as e:
+        return e.value
 
 
 class VariableElfAttackPower:
 
-    def __init__(self, input_):
+    def __init__(self, input_, combat_cls=ElfGoblinCombat):
         self._input_ = input_
+        self.combat_cls = combat_cls
+        self._common_combat = None
+
+    def search(self, step_size=10, workers=None):
+        """
+        Return the lowest elf attack power at which no elf dies, with the Summary of that combat.
+
+        With workers, combats are run speculatively on a process pool. The search asks for the same attack powers in
+        the same order either way, so both return the same result.
+        """
+        if workers is not None and workers > 1:
+            return self._parallel_search(step_size, workers)
+        probes = self._probes(step_size)
+        result = None
+        while True:
+            try:
+                probe = probes.send(result)
+            except StopIteration as e:
+                return e.value
+            result = self._run(probe.attack)
 
-    def search(self, step_size=10):
-        lower_bound_attack, upper_bound_attack = self._find_boundary(step_size)
+    def _probes(self, step_size):
+        """
+        Generate the attack powers the search needs results for, sent back in as they are known.
+        """
+        lower_bound_attack, upper_bound_attack = yield from self._find_boundary(step_size)
         while True:
             middle_attack = (lower_bound_attack + upper_bound_attack) // 2
-            result = self._run(middle_attack)
-            result_plus_one = self._run(middle_attack + 1)
+            result = yield Probe(middle_attack, lower_bound_attack, upper_bound_attack)
+            result_plus_one = yield Probe(middle_attack + 1, lower_bound_attack, upper_bound_attack)
             if (result_pair := (bool(result), bool(result_plus_one))) == (False, True):
                 # crossover point found where elf loss turns into elf win
                 return (middle_attack + 1), result_plus_one
@@ -266,15 +438,32 @@ class VariableElfAttackPower:
         lower_bound_attack = DEFAULT_ATTACK_POWER
         upper_bound_attack = DEFAULT_ATTACK_POWER + step_size
         while True:
-            result = self._run(upper_bound_attack)
+            result = yield Probe(upper_bound_attack, lower_bound_attack, None)
             if bool(result):
                 return lower_bound_attack, upper_bound_attack
             else:
                 lower_bound_attack = upper_bound_attack
                 upper_bound_attack = upper_bound_attack + step_size
 
+    def common_combat(self):
+        """
+        Return the combat at the start of the round the first elf attack lands in.
+
+        Up to then the elf attack power makes no difference, so every trial forks from here instead of round 0.
+        """
+        if self._common_combat is None:
+            elf_goblin_combat = self.combat_cls.read_input(self._input_)
+            snapshot = elf_goblin_combat.snapshot()
+            for _ in elf_goblin_combat.combat(break_at_first_elf_death=True):
+                if (next_snapshot := elf_goblin_combat.snapshot()).elf_attacked:
+                    break
+                snapshot = next_snapshot
+            elf_goblin_combat.restore(snapshot)
+            self._common_combat = elf_goblin_combat
+        return self._common_combat
+
     def _run(self, elf_attack):
-        elf_goblin_combat = ElfGoblinCombat.read_input(self._input_, elf_attack)
+        elf_goblin_combat = self.common_combat().fork(elf_attack)
         combat_gen = elf_goblin_combat.combat(break_at_first_elf_death=True)
         try:
             while True:
@@ -283,8 +472,80 @@ class VariableElfAttackPower:
             result = e.value
         return result
 
+    def _parallel_search(self, step_size, workers):
+        """
+        Drive the same probes as the serial search, keeping the pool busy with the attack powers it is likely to ask
+        about next.
 
-def main():
+        Each worker is sent the combat class, the puzzle input and a snapshot of the common combat once, rebuilds the
+        common combat from them and forks its trials from it. Combats the search can no longer ask about are cancelled
+        if they have not started, and stop at the end of their current round if they have.
+        """
+        snapshot = self.common_combat().snapshot()
+        low = multiprocessing.Value('q', DEFAULT_ATTACK_POWER, lock=False)
+        high = multiprocessing.Value('q', sys.maxsize, lock=False)
+        results = {}
+        futures = {}
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_trial_worker,
+            initargs=(self.combat_cls, self._input_, snapshot, low, high),
+        ) as executor:
+            probes = self._probes(step_size)
+            result = None
+            while True:
+                try:
+                    probe = probes.send(result)
+                except StopIteration as e:
+                    answer = e.value
+                    break
+                low.value = probe.low
+                high.value = sys.maxsize if probe.high is None else probe.high
+                for attack in list(futures):
+                    if not probe.low <= attack <= high.value:
+                        futures.pop(attack).cancel()
+
+                for attack in itertools.chain([probe.attack], self._speculative_attacks(probe, step_size)):
+                    if attack not in results and attack not in futures:
+                        futures[attack] = executor.submit(_run_trial, attack)
+                    if len(futures) >= workers:
+                        break
+
+                while probe.attack not in results:
+                    done, _ = concurrent.futures.wait(
+                        futures.values(), return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for attack, future in list(futures.items()):
+                        if future in done:
+                            del futures[attack]
+                            if (trial_result := future.result()) is not None:
+                                results[attack] = trial_result
+                result = results[probe.attack]
+
+            # stop any combats still running
+            low.value = high.value = -1
+            executor.shutdown(cancel_futures=True)
+        return answer
+
+    @staticmethod
+    def _speculative_attacks(probe, step_size):
+        if probe.high is None:
+            # the next attack powers the boundary search would try
+            yield from itertools.count(probe.attack + step_size, step_size)
+            return
+        # middle of the range, then the middles of each half, as the bisection would visit them
+        ranges = collections.deque([(probe.low, probe.high)])
+        while ranges:
+            low, high = ranges.popleft()
+            middle = (low + high) // 2
+            yield middle
+            yield middle + 1
+            if high - low > 1:
+                ranges.append((low, middle))
+                ranges.append((middle, high))
+
+
+def main(workers=None):
     input_ = ElfGoblinCombat.read_file()
 
     elf_goblin_combat = ElfGoblinCombat.read_input(input_)
@@ -303,7 +564,7 @@ def main():
     print()
 
     variable_elf_attack_power = VariableElfAttackPower(input_)
-    attack, part_2_summary = variable_elf_attack_power.search(step_size=10)
+    attack, part_2_summary = variable_elf_attack_power.search(step_size=10, workers=workers)
 
     print(f'Part 2: attack: {attack}')
     print(f'Part 2: round no: {part_2_summary.round_no}')
@@ -312,4 +573,7 @@ def main():
 
 
 if __name__ == '__main__':
-    print(f"Completed in {timeit.timeit(main, number=1)} seconds")
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, help='processes to search for the elf attack power with')
+    args = parser.parse_args()
+    print(f"Completed in {timeit.timeit(lambda: main(args.workers), number=1)} seconds")
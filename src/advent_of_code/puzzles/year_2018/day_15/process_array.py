@@ -0,0 +1,283 @@
+import collections.abc
+import timeit
+
+from advent_of_code.puzzles.year_2018.day_15.process import Coords
+from advent_of_code.puzzles.year_2018.day_15.process import DEFAULT_ATTACK_POWER
+from advent_of_code.puzzles.year_2018.day_15.process import Map
+from advent_of_code.puzzles.year_2018.day_15.process import Snapshot
+from advent_of_code.puzzles.year_2018.day_15.process import Summary
+from advent_of_code.puzzles.year_2018.day_15.process import Unit
+from advent_of_code.puzzles.year_2018.day_15.process import decode_spaces
+from advent_of_code.puzzles.year_2018.day_15.process import encode_spaces
+from advent_of_code.puzzles.year_2018.day_15.process import parse_grid
+from advent_of_code.puzzles.year_2018.day_15 import process
+
+
+class GridView(collections.abc.Mapping):
+    """
+    Read-only view of an array grid as the Coords -> Map/Unit dict used by process.ElfGoblinCombat, walls excluded.
+    """
+
+    def __init__(self, elf_goblin_combat):
+        self._elf_goblin_combat = elf_goblin_combat
+
+    def __getitem__(self, coords):
+        combat = self._elf_goblin_combat
+        if not (0 <= coords.x < combat.width and 0 <= coords.y < combat.height):
+            raise KeyError(coords)
+        space = combat.cells[combat._position(coords)]
+        if space is Map.WALL:
+            raise KeyError(coords)
+        return space
+
+    def __iter__(self):
+        combat = self._elf_goblin_combat
+        for position, space in enumerate(combat.cells):
+            if space is not Map.WALL:
+                yield combat._coords(position)
+
+    def __len__(self):
+        return sum(space is not Map.WALL for space in self._elf_goblin_combat.cells)
+
+
+class ElfGoblinCombat:
+    """
+    Combat on a flat list of cells indexed by (y + 1) * row_width + x + 1.
+
+    The cave is padded with a border of walls, so every square has four neighbours at fixed offsets and no bounds
+    checks are needed. Each team keeps a roster of the positions of its living units, so checking for a win is a
+    length test rather than a scan of the cave.
+    """
+
+    def __init__(self, grid, elf_attack=DEFAULT_ATTACK_POWER):
+        self.width = max(coords.x for coords in grid) + 1
+        self.height = max(coords.y for coords in grid) + 1
+        self.row_width = self.width + 2
+        self.cells = [Map.WALL] * (self.row_width * (self.height + 2))
+        self.rosters = {Map.ELF: set(), Map.GOBLIN: set()}
+        for coords, space in grid.items():
+            position = self._position(coords)
+            self.cells[position] = space
+            if isinstance(space, Unit):
+                self.rosters[space.unit_type].add(position)
+        # up, left, right, down: reading order
+        self.neighbour_offsets = (-self.row_width, -1, 1, self.row_width)
+        self.grid = GridView(self)
+        self._elf_attack = elf_attack
+        self._goblin_attack = DEFAULT_ATTACK_POWER
+        self._first_elf_death = False
+        self._elf_attacked = False
+        self.round_no = 0
+        # set to a list to record the number of squares each _choose_step search expands
+        self.pathfinding_nodes = None
+
+    read_file = staticmethod(process.ElfGoblinCombat.read_file)
+    fork = process.ElfGoblinCombat.fork
+
+    @classmethod
+    def read_input(cls, input_, elf_attack=DEFAULT_ATTACK_POWER):
+        return cls(parse_grid(input_), elf_attack)
+
+    def _position(self, coords):
+        return (coords.y + 1) * self.row_width + coords.x + 1
+
+    def _coords(self, position):
+        y, x = divmod(position, self.row_width)
+        return Coords(x - 1, y - 1)
+
+    def _grid_unparse(self):
+        rows = []
+        for y in range(1, self.height + 1):
+            row = self.cells[y * self.row_width + 1:y * self.row_width + 1 + self.width]
+            rows.append(''.join(space.unit_type.value if isinstance(space, Unit) else space.value for space in row))
+        return '\n'.join(rows)
+
+    def snapshot(self):
+        spaces, hit_points = encode_spaces(self.cells)
+        return Snapshot(spaces, hit_points, self.round_no, self._first_elf_death, self._elf_attacked)
+
+    def restore(self, snapshot):
+        self.cells = list(decode_spaces(snapshot.spaces, snapshot.hit_points))
+        self.rosters = {Map.ELF: set(), Map.GOBLIN: set()}
+        for position, space in enumerate(self.cells):
+            if isinstance(space, Unit):
+                self.rosters[space.unit_type].add(position)
+        self.grid = GridView(self)
+        self.round_no = snapshot.round_no
+        self._first_elf_death = snapshot.first_elf_death
+        self._elf_attacked = snapshot.elf_attacked
+
+    def combat(self, break_at_first_elf_death=False):
+        while True:
+            win = self.round()
+            if break_at_first_elf_death and self._first_elf_death:
+                return False
+            elif win:
+                hit_points = self._hit_points()
+                return Summary(
+                    self.round_no,
+                    hit_points,
+                    outcome=self.round_no * hit_points,
+                    map=self._grid_unparse(),
+                    grid=self.grid,
+                )
+            else:
+                self.round_no += 1
+                yield
+
+    def round(self):
+        """
+        Return True if game is won before all turns are complete. Return False if full round occurs.
+        """
+        cells = self.cells
+        # flat positions sort in reading order, and units only move on their own turn
+        positions = sorted(self.rosters[Map.ELF] | self.rosters[Map.GOBLIN])
+        for position, unit in [(position, cells[position]) for position in positions]:
+            if unit.hit_points > 0:     # check unit did not die earlier in the round
+                if self._win_condition():  # one team won before a full round
+                    return True
+                self._turn(position)
+        return False
+
+    def turn(self, unit_coord):
+        self._turn(self._position(unit_coord))
+
+    def _turn(self, position):
+        if not (adj_targets := self._adj_target_positions(position)):
+            position = self._move_position(position)
+            adj_targets = self._adj_target_positions(position)
+        if adj_targets:
+            self._attack_weakest(adj_targets)
+
+    def _adj_targets(self, unit_coord):
+        try:
+            space = self.grid[unit_coord]
+        except KeyError as e:
+            raise ValueError('Wall is not a type of unit') from e
+        if not isinstance(space, Unit):
+            raise ValueError('Cavern is not a type of unit')
+        return [self._coords(position) for position in self._adj_target_positions(self._position(unit_coord))]
+
+    def _adj_target_positions(self, position):
+        cells = self.cells
+        unit_type = cells[position].unit_type
+        adj_targets = []
+        for offset in self.neighbour_offsets:
+            adj_space = cells[position + offset]
+            if isinstance(adj_space, Unit) and adj_space.unit_type != unit_type:
+                adj_targets.append(position + offset)
+        return adj_targets
+
+    def _choose_step(self, unit_coord):
+        if not isinstance(self.grid[unit_coord], Unit):
+            raise ValueError('Space is not a type of unit')
+        step = self._choose_step_position(self._position(unit_coord))
+        return None if step is None else self._coords(step)
+
+    def _choose_step_position(self, position):
+        """
+        Breadth-first search from the unit, returning the first step towards the first open square found next to an
+        enemy. Squares are discovered in the same order as process.ElfGoblinCombat._choose_step.
+        """
+        cells = self.cells
+        neighbour_offsets = self.neighbour_offsets
+        unit_type = cells[position].unit_type
+        # visited square -> first step on the path that reached it
+        first_steps = {position: None}
+        queue = collections.deque([position])
+        nodes_expanded = 0
+        chosen_step = None
+        while queue and chosen_step is None:
+            current = queue.popleft()
+            nodes_expanded += 1
+            first_step = first_steps[current]
+            for offset in neighbour_offsets:
+                adj_position = current + offset
+                if adj_position in first_steps:
+                    continue
+                adj_first_step = adj_position if first_step is None else first_step
+                first_steps[adj_position] = adj_first_step
+                if cells[adj_position] is not Map.CAVERN:
+                    continue
+                queue.append(adj_position)
+                if self._is_next_to_enemy(adj_position, unit_type):
+                    chosen_step = adj_first_step
+                    break
+        if self.pathfinding_nodes is not None:
+            self.pathfinding_nodes.append(nodes_expanded)
+        return chosen_step
+
+    def _is_next_to_enemy(self, position, unit_type):
+        cells = self.cells
+        for offset in self.neighbour_offsets:
+            adj_space = cells[position + offset]
+            if isinstance(adj_space, Unit) and adj_space.unit_type != unit_type:
+                return True
+        return False
+
+    def _move(self, unit_coord):
+        return self._coords(self._move_position(self._position(unit_coord)))
+
+    def _move_position(self, position):
+        chosen_step = self._choose_step_position(position)
+        if chosen_step is None:
+            return position
+        unit = self.cells[position]
+        self.cells[position] = Map.CAVERN
+        self.cells[chosen_step] = unit
+        roster = self.rosters[unit.unit_type]
+        roster.remove(position)
+        roster.add(chosen_step)
+        return chosen_step
+
+    def _select_and_attack(self, adj_targets):
+        self._attack_weakest([self._position(target_coord) for target_coord in adj_targets])
+
+    def _attack_weakest(self, adj_targets):
+        # selects weakest target - chooses first in reading order if tie
+        cells = self.cells
+        target_position = min(adj_targets, key=lambda position: cells[position].hit_points)
+        target = cells[target_position]
+        if target.unit_type == Map.ELF:
+            target.hit_points -= self._goblin_attack
+        elif target.unit_type == Map.GOBLIN:
+            target.hit_points -= self._elf_attack
+            self._elf_attacked = True
+        if target.hit_points <= 0:
+            # target is dead
+            self._kill(target_position)
+
+    def _kill(self, position):
+        unit = self.cells[position]
+        self.cells[position] = Map.CAVERN
+        self.rosters[unit.unit_type].remove(position)
+        if unit.unit_type == Map.ELF:
+            self._first_elf_death = True
+
+    def _win_condition(self):
+        # all of one type died
+        return not self.rosters[Map.ELF] or not self.rosters[Map.GOBLIN]
+
+    def _hit_points(self):
+        return sum(self.cells[position].hit_points for roster in self.rosters.values() for position in roster)
+
+
+def main():
+    input_ = ElfGoblinCombat.read_file()
+
+    elf_goblin_combat = ElfGoblinCombat.read_input(input_)
+    combat_gen = elf_goblin_combat.combat()
+
+    try:
+        while True:
+            next(combat_gen)
+    except StopIteration as e:
+        part_1_summary = e.value
+
+    print(f'Part 1: round no: {part_1_summary.round_no}')
+    print(f'Part 1: hit points: {part_1_summary.hit_points}')
+    print(f'Part 1: outcome: {part_1_summary.outcome}')
+
+
+if __name__ == '__main__':
+    print(f"Completed in {timeit.timeit(main, number=1)} seconds")
@@ -0,0 +1,196 @@
+import collections
+import itertools
+import math
+import timeit
+
+from advent_of_code.puzzles.year_2018.day_15.process import DEFAULT_ATTACK_POWER
+from advent_of_code.puzzles.year_2018.day_15.process import Map
+from advent_of_code.puzzles.year_2018.day_15 import process_array
+
+
+class ElfGoblinCombat(process_array.ElfGoblinCombat):
+    """
+    Array combat that steers units with one distance field per team instead of a search per turn.
+
+    A team's field holds, for every square, the number of steps to the nearest open square next to an enemy, or
+    infinity if there is none. The search in process.ElfGoblinCombat reaches squares in the order of their shortest
+    path that comes first when steps are compared up, left, right, down, so the step it takes is the first step of the
+    first such path to any of the nearest squares in range: the first neighbour in reading order with the lowest
+    distance.
+
+    A unit moving or dying only changes the squares it leaves or enters and their neighbours, so the fields are
+    repaired from there rather than rebuilt: squares that lost the neighbour their distance came from are cleared,
+    then distances spread back out from the cleared and changed squares.
+    """
+
+    def __init__(self, grid, elf_attack=DEFAULT_ATTACK_POWER):
+        super().__init__(grid, elf_attack)
+        # unit type -> (distance field, number of enemies next to each square) for that team, built the first time
+        # one of its units moves
+        self._fields = {}
+        # unit type -> squares changed since that team's field was last repaired
+        self._stale_positions = {}
+        self._squares_settled = 0
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        self._fields = {}
+        self._stale_positions = {}
+
+    def _choose_step_position(self, position):
+        distances, _ = self._field(self.cells[position].unit_type)
+        chosen_step = None
+        lowest_distance = math.inf
+        for offset in self.neighbour_offsets:
+            if distances[position + offset] < lowest_distance:
+                chosen_step = position + offset
+                lowest_distance = distances[position + offset]
+        if self.pathfinding_nodes is not None:
+            # squares settled building or repairing fields since the last step was chosen
+            self.pathfinding_nodes.append(self._squares_settled)
+        self._squares_settled = 0
+        return chosen_step
+
+    def _move_position(self, position):
+        chosen_step = super()._move_position(position)
+        if chosen_step != position:
+            unit_type = self.cells[chosen_step].unit_type
+            self._count_enemies(position, unit_type, -1)
+            self._count_enemies(chosen_step, unit_type, 1)
+            self._mark_stale((position, chosen_step))
+        return chosen_step
+
+    def _kill(self, position):
+        unit_type = self.cells[position].unit_type
+        super()._kill(position)
+        self._count_enemies(position, unit_type, -1)
+        self._mark_stale((position,))
+
+    def _count_enemies(self, position, unit_type, change):
+        for field_unit_type, (_, enemies) in self._fields.items():
+            if field_unit_type != unit_type:
+                for offset in self.neighbour_offsets:
+                    enemies[position + offset] += change
+
+    def _mark_stale(self, changed_positions):
+        # a square's distance depends on whether it is open and on what is next to it
+        for stale_positions in self._stale_positions.values():
+            for position in changed_positions:
+                stale_positions.add(position)
+                stale_positions.update(position + offset for offset in self.neighbour_offsets)
+
+    def _field(self, unit_type):
+        """
+        Return the team's field, building it or repairing it from every change since it was last asked for.
+
+        A team's units often have no step to choose for several turns, such as when they are all fighting, so fields
+        are only brought up to date when they are needed.
+        """
+        if unit_type not in self._fields:
+            cells = self.cells
+            enemies = [0] * len(cells)
+            for enemy_unit_type, roster in self.rosters.items():
+                if enemy_unit_type != unit_type:
+                    for position in roster:
+                        for offset in self.neighbour_offsets:
+                            enemies[position + offset] += 1
+            distances = [math.inf] * len(cells)
+            queue = collections.deque()
+            for position, space in enumerate(cells):
+                if space is Map.CAVERN and enemies[position]:
+                    distances[position] = 0
+                    queue.append(position)
+            while queue:
+                position = queue.popleft()
+                self._squares_settled += 1
+                for offset in self.neighbour_offsets:
+                    adj_position = position + offset
+                    if cells[adj_position] is Map.CAVERN and distances[adj_position] == math.inf:
+                        distances[adj_position] = distances[position] + 1
+                        queue.append(adj_position)
+            self._fields[unit_type] = distances, enemies
+            self._stale_positions[unit_type] = set()
+        elif stale_positions := self._stale_positions[unit_type]:
+            self._repair_field(*self._fields[unit_type], stale_positions)
+            self._stale_positions[unit_type] = set()
+        return self._fields[unit_type]
+
+    def _repair_field(self, distances, enemies, changed):
+        # every step is one square, so squares are settled a distance at a time from buckets rather than a heap
+        cells = self.cells
+        cavern = Map.CAVERN
+        inf = math.inf
+        up, left, right, down = self.neighbour_offsets
+        squares_settled = 0
+
+        # squares that can only get further away lose their distance first, lowest first, along with every square
+        # whose distance relied on them
+        raised = []
+        buckets = collections.defaultdict(list)
+        for position in changed:
+            if distances[position] != inf:
+                buckets[distances[position]].append(position)
+        while buckets:
+            distance = min(buckets)
+            next_distance = distance + 1
+            for position in buckets.pop(distance):
+                if distances[position] != distance:
+                    continue
+                if cells[position] is cavern and (enemies[position] or min(
+                    distances[position + up], distances[position + left],
+                    distances[position + right], distances[position + down],
+                ) < distance):
+                    continue
+                distances[position] = inf
+                raised.append(position)
+                squares_settled += 1
+                for adj_position in (position + up, position + left, position + right, position + down):
+                    if distances[adj_position] == next_distance:
+                        buckets[next_distance].append(adj_position)
+
+        # then every square that can get closer is settled outwards from the lowest, as in a breadth-first search
+        for position in itertools.chain(raised, changed):
+            if cells[position] is not cavern:
+                continue
+            if enemies[position]:
+                expected = 0
+            else:
+                expected = min(
+                    distances[position + up], distances[position + left],
+                    distances[position + right], distances[position + down],
+                ) + 1
+            if expected < distances[position]:
+                buckets[expected].append(position)
+        while buckets:
+            distance = min(buckets)
+            next_distance = distance + 1
+            for position in buckets.pop(distance):
+                if distance >= distances[position]:
+                    continue
+                distances[position] = distance
+                squares_settled += 1
+                for adj_position in (position + up, position + left, position + right, position + down):
+                    if next_distance < distances[adj_position] and cells[adj_position] is cavern:
+                        buckets[next_distance].append(adj_position)
+        self._squares_settled += squares_settled
+
+
+def main():
+    input_ = ElfGoblinCombat.read_file()
+
+    elf_goblin_combat = ElfGoblinCombat.read_input(input_)
+    combat_gen = elf_goblin_combat.combat()
+
+    try:
+        while True:
+            next(combat_gen)
+    except StopIteration as e:
+        part_1_summary = e.value
+
+    print(f'Part 1: round no: {part_1_summary.round_no}')
+    print(f'Part 1: hit points: {part_1_summary.hit_points}')
+    print(f'Part 1: outcome: {part_1_summary.outcome}')
+
+
+if __name__ == '__main__':
+    print(f"Completed in {timeit.timeit(main, number=1)} seconds")
@@ -1,17 +1,40 @@
+import itertools
+
 import pytest
 
+from advent_of_code.puzzles.year_2018.day_15 import benchmark
 from advent_of_code.puzzles.year_2018.day_15 import process
+from advent_of_code.puzzles.year_2018.day_15 import process_array
+from advent_of_code.puzzles.year_2018.day_15 import process_fields
+
+
+ENGINES = {
+    'process': process.ElfGoblinCombat,
+    'process_array': process_array.ElfGoblinCombat,
+    'process_fields': process_fields.ElfGoblinCombat,
+}
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    return request.param
+
+
+@pytest.fixture
+def combat_cls(engine):
+    # combat tests run against each engine, including the combats VariableElfAttackPower starts
+    return ENGINES[engine]
 
 
 class TestGridParse:
-    def test_grid_parse(self):
+    def test_grid_parse(self, combat_cls):
         input_ = """\
 #######
 #.G.E.#
 #E.G.E#
 #.G.E.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat.grid == {
             process.Coords(1, 1): process.Map.CAVERN,
             process.Coords(2, 1): process.Unit(process.Map.GOBLIN),
@@ -33,56 +56,56 @@ class TestGridParse:
 
 class TestAdjTargets:
 
-    def test_adj_target_raises_exception_if_passed_a_wall_space(self):
+    def test_adj_target_raises_exception_if_passed_a_wall_space(self, combat_cls):
         input_ = """\
 #######
 #.GE..#
 #.E...#
 #...G.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         with pytest.raises(ValueError):
             elf_goblin_combat._adj_targets(process.Coords(0, 0))
 
-    def test_adj_target_raises_exception_if_passed_a_cavern_space(self):
+    def test_adj_target_raises_exception_if_passed_a_cavern_space(self, combat_cls):
         input_ = """\
 #######
 #.GE..#
 #.E...#
 #...G.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         with pytest.raises(ValueError):
             elf_goblin_combat._adj_targets(process.Coords(1, 1))
 
-    def test_adj_target_with_no_units_in_range(self):
+    def test_adj_target_with_no_units_in_range(self, combat_cls):
         input_ = """\
 #######
 #.GE..#
 #.E...#
 #...G.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._adj_targets(process.Coords(4, 3)) == []
 
-    def test_adj_target_with_one_units_in_range(self):
+    def test_adj_target_with_one_units_in_range(self, combat_cls):
         input_ = """\
 #######
 #.GE..#
 #.E...#
 #...G.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._adj_targets(process.Coords(3, 1)) == [process.Coords(2, 1)]
 
-    def test_adj_target_with_multiple_units_in_range_returns_units_in_reading_order(self):
+    def test_adj_target_with_multiple_units_in_range_returns_units_in_reading_order(self, combat_cls):
         input_ = """\
 #######
 #.E...#
 #EGE..#
 #.E...#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._adj_targets(process.Coords(2, 2)) == [
             process.Coords(2, 1),
             process.Coords(1, 2),
@@ -90,30 +113,30 @@ class TestAdjTargets:
             process.Coords(2, 3),
         ]
 
-    def test_adj_target_only_picks_up_enemy_targets(self):
+    def test_adj_target_only_picks_up_enemy_targets(self, combat_cls):
         input_ = """\
 #######
 #.GE..#
 #.G...#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._adj_targets(process.Coords(2, 1)) == [process.Coords(3, 1)]
 
 
 class TestChooseStep:
 
-    def test_target_picks_up_in_range_squares_for_one_target(self):
+    def test_target_picks_up_in_range_squares_for_one_target(self, combat_cls):
         input_ = """\
 #######
 #.....#
 #.G.E.#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._choose_step(process.Coords(2, 2)) == process.Coords(3, 2)
 
-    def test_target_picks_up_in_range_squares_for_multiple_targets(self):
+    def test_target_picks_up_in_range_squares_for_multiple_targets(self, combat_cls):
         input_ = """\
 #######
 #.....#
@@ -122,50 +145,50 @@ class TestChooseStep:
 #...E.#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._choose_step(process.Coords(2, 2)) == process.Coords(3, 2)
 
-    def test_target_does_not_consider_in_range_squares_for_friendly_units(self):
+    def test_target_does_not_consider_in_range_squares_for_friendly_units(self, combat_cls):
         input_ = """\
 #######
 #.....#
 #.G.G.#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._choose_step(process.Coords(2, 2)) is None
 
-    def test_target_does_not_consider_in_range_squares_for_targets_that_are_unreachable(self):
+    def test_target_does_not_consider_in_range_squares_for_targets_that_are_unreachable(self, combat_cls):
         input_ = """\
 ###########
 #......G..#
 #.G....#.E#
 #......G..#
 ###########"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._choose_step(process.Coords(2, 2)) is None
 
-    def test_target_finds_shortest_path_by_reading_order(self):
+    def test_target_finds_shortest_path_by_reading_order(self, combat_cls):
         input_ = """\
 #######
 #.....#
 #.GE..#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat._choose_step(process.Coords(2, 2)) == process.Coords(2, 1)
 
 
 class TestMove:
 
-    def test_move_if_valid_move_exists(self):
+    def test_move_if_valid_move_exists(self, combat_cls):
         input_ = """\
 #######
 #.....#
 #.GE..#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat.grid[process.Coords(2, 1)] == process.Map.CAVERN
         assert elf_goblin_combat.grid[process.Coords(2, 2)] == process.Unit(process.Map.GOBLIN)
 
@@ -174,14 +197,14 @@ class TestMove:
         assert elf_goblin_combat.grid[process.Coords(2, 1)] == process.Unit(process.Map.GOBLIN)
         assert elf_goblin_combat.grid[process.Coords(2, 2)] == process.Map.CAVERN
 
-    def test_dont_move_if_valid_move_does_not_exist(self):
+    def test_dont_move_if_valid_move_does_not_exist(self, combat_cls):
         input_ = """\
 #######
 #.....#
 #.GG..#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(input_)
+        elf_goblin_combat = combat_cls.read_input(input_)
         assert elf_goblin_combat.grid[process.Coords(2, 1)] == process.Map.CAVERN
         assert elf_goblin_combat.grid[process.Coords(2, 2)] == process.Unit(process.Map.GOBLIN)
 
@@ -193,7 +216,7 @@ class TestMove:
 
 class TestTurn:
 
-    def test_larger_example_of_movement(self):
+    def test_larger_example_of_movement(self, combat_cls):
         initial_grid = """\
 #########
 #G..G..G#
@@ -204,7 +227,7 @@ class TestTurn:
 #.......#
 #G..G..G#
 #########"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
 
         elf_goblin_combat.round()
 
@@ -255,14 +278,14 @@ class TestTurn:
 
 class TestSelectAndAttack:
 
-    def test_select_and_attack_health_does_not_drop_below_0_and_unit_does_not_die(self):
+    def test_select_and_attack_health_does_not_drop_below_0_and_unit_does_not_die(self, combat_cls):
         initial_grid = """\
 G....
 ..G..
 ..EG.
 ..G..
 ...G."""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
 
         elf_goblin_combat.grid[process.Coords(0, 0)].hit_points = 9
         elf_goblin_combat.grid[process.Coords(2, 1)].hit_points = 5
@@ -279,14 +302,14 @@ G....
 
         assert elf_goblin_combat.grid[process.Coords(3, 2)].hit_points == 1
 
-    def test_select_and_attack_health_goes_to_exactly_0_and_unit_dies(self):
+    def test_select_and_attack_health_goes_to_exactly_0_and_unit_dies(self, combat_cls):
         initial_grid = """\
 G....
 ..G..
 ..EG.
 ..G..
 ...G."""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
 
         elf_goblin_combat.grid[process.Coords(0, 0)].hit_points = 9
         elf_goblin_combat.grid[process.Coords(2, 1)].hit_points = 4
@@ -303,14 +326,14 @@ G....
 
         assert elf_goblin_combat.grid[process.Coords(3, 2)] == process.Map.CAVERN
 
-    def test_select_and_attack_health_drops_below_0_and_unit_dies(self):
+    def test_select_and_attack_health_drops_below_0_and_unit_dies(self, combat_cls):
         initial_grid = """\
 G....
 ..G..
 ..EG.
 ..G..
 ...G."""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
 
         elf_goblin_combat.grid[process.Coords(0, 0)].hit_points = 9
         elf_goblin_combat.grid[process.Coords(2, 1)].hit_points = 4
@@ -330,14 +353,14 @@ G....
 
 class TestCombat:
 
-    def test_combat_with_elf_death_before_end_of_turn_1_and_no_more_goblins_count_as_1_full_turn(self):
+    def test_combat_with_elf_death_before_end_of_turn_1_and_no_more_goblins_count_as_1_full_turn(self, combat_cls):
         initial_grid = """\
 .....
 ..G..
 ..E..
 .....
 ....."""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
 
         elf_goblin_combat.grid[process.Coords(2, 2)].hit_points = 1      # dies after 1 hits
 
@@ -352,14 +375,14 @@ class TestCombat:
 
         assert summary.round_no == 1        # one full round occurs as combat goes to second round but second round ends prematurely
 
-    def test_combat_with_elf_death_before_end_of_turn_1_and_at_least_one_goblin_left_does_not_count_as_1_full_turn(self):
+    def test_combat_with_elf_death_before_end_of_turn_1_and_at_least_one_goblin_left_does_not_count_as_1_full_turn(self, combat_cls):
         initial_grid = """\
 .....
 ..G..
 ..E..
 ..G..
 ....."""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
 
         elf_goblin_combat.grid[process.Coords(2, 2)].hit_points = 1  # dies after 1 hits
 
@@ -375,9 +398,29 @@ class TestCombat:
         assert summary.round_no == 0        # no full round occurs as the combat ends prematurely in first round - second goblin has no targets
 
 
+    def test_unit_moving_into_square_of_unit_that_died_earlier_in_round_does_not_take_another_turn(self, combat_cls):
+        initial_grid = """\
+#######
+#..E..#
+#.EG..#
+#..G..#
+#.....#
+#######"""
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
+
+        elf_goblin_combat.grid[process.Coords(3, 2)].hit_points = 2      # dies to the first elf's attack
+
+        assert not elf_goblin_combat.round()
+
+        # the second elf steps into the dead goblin's square and attacks once, not again on the dead goblin's turn
+        assert elf_goblin_combat.grid[process.Coords(3, 2)].unit_type == process.Map.ELF
+        assert elf_goblin_combat.grid[process.Coords(3, 3)].hit_points == 197
+        assert elf_goblin_combat.grid[process.Coords(3, 2)].hit_points == 197
+
+
 class TestComplexCombat:
 
-    def test_detailed_sample_combat(self):
+    def test_detailed_sample_combat(self, combat_cls):
         initial_grid = """\
 #######
 #.G...#
@@ -386,7 +429,7 @@ class TestComplexCombat:
 #..G#E#
 #.....#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
         combat_gen = elf_goblin_combat.combat()
 
         next(combat_gen)
@@ -655,7 +698,7 @@ class TestComplexCombat:
         assert summary.grid[process.Coords(5, 5)].unit_type == process.Map.GOBLIN
         assert summary.grid[process.Coords(5, 5)].hit_points == 200
 
-    def test_summary_sample_combat_1(self):
+    def test_summary_sample_combat_1(self, combat_cls):
         initial_grid = """\
 #######
 #G..#E#
@@ -664,7 +707,7 @@ class TestComplexCombat:
 #...#E#
 #...E.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
         combat_gen = elf_goblin_combat.combat()
 
         try:
@@ -701,7 +744,7 @@ class TestComplexCombat:
         assert summary.grid[process.Coords(5, 4)].unit_type == process.Map.ELF
         assert summary.grid[process.Coords(5, 4)].hit_points == 200
 
-    def test_summary_sample_combat_2(self):
+    def test_summary_sample_combat_2(self, combat_cls):
         initial_grid = """\
 #######
 #E..EG#
@@ -710,7 +753,7 @@ class TestComplexCombat:
 #G..#.#
 #..E#.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
         combat_gen = elf_goblin_combat.combat()
 
         try:
@@ -747,7 +790,7 @@ class TestComplexCombat:
         assert summary.grid[process.Coords(2, 4)].unit_type == process.Map.ELF
         assert summary.grid[process.Coords(2, 4)].hit_points == 200
 
-    def test_summary_sample_combat_3(self):
+    def test_summary_sample_combat_3(self, combat_cls):
         initial_grid = """\
 #######
 #E.G#.#
@@ -756,7 +799,7 @@ class TestComplexCombat:
 #G..#.#
 #...E.#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
         combat_gen = elf_goblin_combat.combat()
 
         try:
@@ -793,7 +836,7 @@ class TestComplexCombat:
         assert summary.grid[process.Coords(4, 5)].unit_type == process.Map.GOBLIN
         assert summary.grid[process.Coords(4, 5)].hit_points == 200
 
-    def test_summary_sample_combat_4(self):
+    def test_summary_sample_combat_4(self, combat_cls):
         initial_grid = """\
 #######
 #.E...#
@@ -802,7 +845,7 @@ class TestComplexCombat:
 #E#G#G#
 #...#G#
 #######"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
         combat_gen = elf_goblin_combat.combat()
 
         try:
@@ -836,7 +879,7 @@ class TestComplexCombat:
         assert summary.grid[process.Coords(5, 5)].unit_type == process.Map.GOBLIN
         assert summary.grid[process.Coords(5, 5)].hit_points == 200
 
-    def test_summary_sample_combat_5(self):
+    def test_summary_sample_combat_5(self, combat_cls):
         initial_grid = """\
 #########
 #G......#
@@ -847,7 +890,7 @@ class TestComplexCombat:
 #.G...G.#
 #.....G.#
 #########"""
-        elf_goblin_combat = process.ElfGoblinCombat.read_input(initial_grid)
+        elf_goblin_combat = combat_cls.read_input(initial_grid)
         combat_gen = elf_goblin_combat.combat()
 
         try:
@@ -889,7 +932,7 @@ class TestComplexCombat:
 
 class TestVariableElfAttackPower:
 
-    def test_summary_sample_combat_1(self):
+    def test_summary_sample_combat_1(self, combat_cls):
         initial_grid = """\
 #######
 #.G...#
@@ -898,7 +941,7 @@ class TestVariableElfAttackPower:
 #..G#E#
 #.....#
 #######"""
-        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid)
+        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid, combat_cls)
         attack, summary = variable_elf_attack_power.search()
 
         assert attack == 15
@@ -922,7 +965,7 @@ class TestVariableElfAttackPower:
         assert summary.grid[process.Coords(4, 2)].unit_type == process.Map.ELF
         assert summary.grid[process.Coords(4, 2)].hit_points == 14
 
-    def test_summary_sample_combat_2(self):
+    def test_summary_sample_combat_2(self, combat_cls):
         initial_grid = """\
 #######
 #E..EG#
@@ -931,7 +974,7 @@ class TestVariableElfAttackPower:
 #G..#.#
 #..E#.#
 #######"""
-        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid)
+        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid, combat_cls)
         attack, summary = variable_elf_attack_power.search()
 
         assert attack == 4
@@ -967,7 +1010,7 @@ class TestVariableElfAttackPower:
         assert summary.grid[process.Coords(2, 4)].unit_type == process.Map.ELF
         assert summary.grid[process.Coords(2, 4)].hit_points == 200
 
-    def test_summary_sample_combat_3(self):
+    def test_summary_sample_combat_3(self, combat_cls):
         initial_grid = """\
 #######
 #E.G#.#
@@ -976,7 +1019,7 @@ class TestVariableElfAttackPower:
 #G..#.#
 #...E.#
 #######"""
-        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid)
+        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid, combat_cls)
         attack, summary = variable_elf_attack_power.search()
 
         assert attack == 15
@@ -1000,7 +1043,7 @@ class TestVariableElfAttackPower:
         assert summary.grid[process.Coords(3, 2)].unit_type == process.Map.ELF
         assert summary.grid[process.Coords(3, 2)].hit_points == 86
 
-    def test_summary_sample_combat_4(self):
+    def test_summary_sample_combat_4(self, combat_cls):
         initial_grid = """\
 #######
 #.E...#
@@ -1009,7 +1052,7 @@ class TestVariableElfAttackPower:
 #E#G#G#
 #...#G#
 #######"""
-        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid)
+        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid, combat_cls)
         attack, summary = variable_elf_attack_power.search()
 
         assert attack == 12
@@ -1033,7 +1076,7 @@ class TestVariableElfAttackPower:
         assert summary.grid[process.Coords(5, 2)].unit_type == process.Map.ELF
         assert summary.grid[process.Coords(5, 2)].hit_points == 152
 
-    def test_summary_sample_combat_5(self):
+    def test_summary_sample_combat_5(self, combat_cls):
         initial_grid = """\
 #########
 #G......#
@@ -1044,7 +1087,7 @@ class TestVariableElfAttackPower:
 #.G...G.#
 #.....G.#
 #########"""
-        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid)
+        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid, combat_cls)
         attack, summary = variable_elf_attack_power.search()
 
         assert attack == 34
@@ -1066,3 +1109,217 @@ class TestVariableElfAttackPower:
 
         assert summary.grid[process.Coords(2, 2)].unit_type == process.Map.ELF
         assert summary.grid[process.Coords(2, 2)].hit_points == 38
+
+
+    @pytest.mark.parametrize('step_size', [1, 10])
+    def test_parallel_search_matches_serial_search(self, step_size, combat_cls):
+        initial_grid = """\
+#########
+#G......#
+#.E.#...#
+#..##..G#
+#...##..#
+#...#...#
+#.G...G.#
+#.....G.#
+#########"""
+        variable_elf_attack_power = process.VariableElfAttackPower(initial_grid, combat_cls)
+        serial_attack, serial_summary = variable_elf_attack_power.search(step_size)
+        parallel_attack, parallel_summary = variable_elf_attack_power.search(step_size, workers=3)
+
+        assert parallel_attack == serial_attack == 34
+        assert parallel_summary.round_no == serial_summary.round_no
+        assert parallel_summary.hit_points == serial_summary.hit_points
+        assert parallel_summary.map == serial_summary.map
+
+    def test_trial_worker_rebuilds_common_combat_from_snapshot(self, monkeypatch, combat_cls):
+        for name in ('_trial_combat', '_trial_low', '_trial_high'):
+            monkeypatch.setattr(process, name, None)
+        common_combat = process.VariableElfAttackPower(SNAPSHOT_SAMPLE, combat_cls).common_combat()
+        process._init_trial_worker(combat_cls, SNAPSHOT_SAMPLE, common_combat.snapshot(), None, None)
+        assert process._trial_combat is not common_combat
+        assert process._trial_combat.snapshot() == common_combat.snapshot()
+
+    def test_speculative_attacks_follow_bisection_order(self):
+        probe = process.Probe(attack=8, low=3, high=13)
+        speculative_attacks = process.VariableElfAttackPower._speculative_attacks(probe, step_size=10)
+        assert list(itertools.islice(speculative_attacks, 6)) == [8, 9, 5, 6, 10, 11]
+
+    def test_speculative_attacks_step_past_boundary_probe(self):
+        probe = process.Probe(attack=13, low=3, high=None)
+        speculative_attacks = process.VariableElfAttackPower._speculative_attacks(probe, step_size=10)
+        assert list(itertools.islice(speculative_attacks, 3)) == [23, 33, 43]
+
+
+SNAPSHOT_SAMPLE = """\
+#######
+#.G...#
+#...EG#
+#.#.#G#
+#..G#E#
+#.....#
+#######"""
+
+
+def run_combat(elf_goblin_combat, break_at_first_elf_death=False):
+    combat_gen = elf_goblin_combat.combat(break_at_first_elf_death)
+    try:
+        while True:
+            next(combat_gen)
+    except StopIteration as e:
+        return e.value
+
+
+class TestSnapshot:
+
+    def test_restore_resumes_combat_from_snapshot(self, combat_cls):
+        expected = run_combat(combat_cls.read_input(SNAPSHOT_SAMPLE))
+
+        elf_goblin_combat = combat_cls.read_input(SNAPSHOT_SAMPLE)
+        combat_gen = elf_goblin_combat.combat()
+        for _ in range(10):
+            next(combat_gen)
+        snapshot = elf_goblin_combat.snapshot()
+        assert snapshot.round_no == 10
+
+        run_combat(elf_goblin_combat)
+        elf_goblin_combat.restore(snapshot)
+        assert elf_goblin_combat.snapshot() == snapshot
+
+        summary = run_combat(elf_goblin_combat)
+        assert (summary.round_no, summary.hit_points, summary.map) == (
+            expected.round_no, expected.hit_points, expected.map
+        )
+
+    def test_fork_shares_no_units(self, combat_cls):
+        elf_goblin_combat = combat_cls.read_input(SNAPSHOT_SAMPLE)
+        forked = elf_goblin_combat.fork()
+        forked.grid[process.Coords(2, 1)].hit_points = 1
+        assert elf_goblin_combat.grid[process.Coords(2, 1)].hit_points == 200
+
+    @pytest.mark.parametrize('input_', [SNAPSHOT_SAMPLE, """\
+#######
+#G....#
+#.....#
+#.....#
+#....E#
+#######"""])
+    def test_fork_from_common_combat_matches_combat_from_scratch(self, input_, combat_cls):
+        common_combat = process.VariableElfAttackPower(input_, combat_cls).common_combat()
+        for elf_attack in (4, 15, 40):
+            expected = run_combat(combat_cls.read_input(input_, elf_attack))
+            summary = run_combat(common_combat.fork(elf_attack))
+            assert (summary.round_no, summary.hit_points, summary.map) == (
+                expected.round_no, expected.hit_points, expected.map
+            )
+
+    def test_fork_with_elf_attack_matches_combat_from_scratch(self, combat_cls):
+        elf_goblin_combat = combat_cls.read_input(SNAPSHOT_SAMPLE)
+        for elf_attack in (4, 15, 40):
+            expected = run_combat(combat_cls.read_input(SNAPSHOT_SAMPLE, elf_attack))
+            summary = run_combat(elf_goblin_combat.fork(elf_attack))
+            assert (summary.round_no, summary.hit_points, summary.map) == (
+                expected.round_no, expected.hit_points, expected.map
+            )
+
+    def test_common_combat_stops_before_first_elf_attack(self, combat_cls):
+        input_ = """\
+#######
+#G....#
+#.....#
+#.....#
+#....E#
+#######"""
+        common_combat = process.VariableElfAttackPower(input_, combat_cls).common_combat()
+        assert common_combat.round_no == 2
+        assert not common_combat.snapshot().elf_attacked
+
+        elf_goblin_combat = common_combat.fork()
+        elf_goblin_combat.round()
+        assert elf_goblin_combat.snapshot().elf_attacked
+
+
+class TestPathfindingNodes:
+
+    def test_pathfinding_nodes_not_recorded_by_default(self, combat_cls):
+        input_ = """\
+#######
+#.....#
+#.G.E.#
+#.....#
+#######"""
+        elf_goblin_combat = combat_cls.read_input(input_)
+        elf_goblin_combat._choose_step(process.Coords(2, 2))
+        assert elf_goblin_combat.pathfinding_nodes is None
+
+    def test_pathfinding_nodes_recorded_per_search(self, engine, combat_cls):
+        if engine == 'process_fields':
+            pytest.skip('the distance field engine records squares settled in its fields instead')
+        input_ = """\
+#######
+#.....#
+#.G.E.#
+#.....#
+#######"""
+        elf_goblin_combat = combat_cls.read_input(input_)
+        elf_goblin_combat.pathfinding_nodes = []
+        assert elf_goblin_combat._choose_step(process.Coords(2, 2)) == process.Coords(3, 2)
+        assert elf_goblin_combat._choose_step(process.Coords(4, 2)) == process.Coords(3, 2)
+        # both units find (3, 2), next to the other, while expanding their own square
+        assert elf_goblin_combat.pathfinding_nodes == [1, 1]
+
+    def test_pathfinding_nodes_recorded_per_field_update(self, engine, combat_cls):
+        if engine != 'process_fields':
+            pytest.skip('only the distance field engine keeps fields')
+        input_ = """\
+#######
+#.....#
+#.G.E.#
+#.....#
+#######"""
+        elf_goblin_combat = combat_cls.read_input(input_)
+        elf_goblin_combat.pathfinding_nodes = []
+        assert elf_goblin_combat._choose_step(process.Coords(2, 2)) == process.Coords(3, 2)
+        assert elf_goblin_combat._choose_step(process.Coords(4, 2)) == process.Coords(3, 2)
+        # each team's field is built over all 13 open squares, then looked up again for free
+        assert elf_goblin_combat._choose_step(process.Coords(2, 2)) == process.Coords(3, 2)
+        assert elf_goblin_combat.pathfinding_nodes == [13, 13, 0]
+
+
+class TestDistanceFields:
+
+    def test_repaired_fields_match_rebuilt_fields(self, engine, combat_cls):
+        if engine != 'process_fields':
+            pytest.skip('only the distance field engine keeps fields')
+        elf_goblin_combat = combat_cls.read_input(SNAPSHOT_SAMPLE)
+        for _ in elf_goblin_combat.combat():
+            rebuilt = elf_goblin_combat.fork()
+            for unit_type in list(elf_goblin_combat._fields):
+                assert elf_goblin_combat._field(unit_type) == rebuilt._field(unit_type)
+
+
+class TestBenchmark:
+
+    def test_generated_cave_units_all_reach_each_other(self):
+        input_ = benchmark.generate_cave(20, 20, 12, wall_fraction=0.4, seed=3)
+        rows = input_.split('\n')
+        units = {(x, y) for y, row in enumerate(rows) for x, space in enumerate(row) if space in 'EG'}
+        assert len(units) == 12
+        grid = [[process.Map.CAVERN.value if space in 'EG' else space for space in row] for row in rows]
+        assert units <= benchmark._largest_area(grid)
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        baseline = {
+            'cave/process_array/combat': {'outcome': 100, 'rounds_per_second': 50.0, 'peak_memory': 1000},
+            'cave/process_array/search': {'attack': 15, 'outcome': 90, 'seconds': 2.0, 'peak_memory': 1000},
+        }
+        results = {
+            'cave/process_array/combat': {'outcome': 100, 'rounds_per_second': 45.0, 'peak_memory': 1300},
+            'cave/process_array/search': {'attack': 16, 'outcome': 90, 'seconds': 2.2, 'peak_memory': 1000},
+            'other_cave/process_array/combat': {'outcome': 1, 'rounds_per_second': 1.0, 'peak_memory': 1},
+        }
+        assert benchmark.compare(results, baseline, threshold=0.2) == [
+            'cave/process_array/combat: peak memory 1300 bytes was 1000 bytes',
+            'cave/process_array/search: attack 16 was 15',
+        ]
+        assert len(benchmark.compare(results, baseline, threshold=0.05)) == 4
@@ -0,0 +1,86 @@
+import dataclasses
+import time
+
+import numpy as np
+
+from advent_of_code.puzzles.year_2018.day_16 import process
+from advent_of_code.puzzles.year_2018.day_16 import process_numpy
+from advent_of_code.puzzles.year_2018.day_16.process import OPCODES
+
+
+ENGINES = {
+    'process': process.DeviceVM,
+    'process_numpy': process_numpy.DeviceVM,
+}
+
+SAMPLE_COUNTS = (1_000, 100_000, 1_000_000)
+# the original engine checks each sample against each opcode in Python, so it is only timed on the smaller sets
+MAX_PROCESS_SAMPLES = 100_000
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkResult:
+    engine: str
+    samples: int
+    total: int
+    seconds: float
+
+    @property
+    def samples_per_second(self):
+        return self.samples / self.seconds
+
+
+def generate_samples(sample_count, seed=0):
+    """
+    Return sample_count random samples as rows of a process_numpy sample array, along with the opcode each opcode
+    number was given.
+    """
+    rng = np.random.default_rng(seed)
+    opcodes = [OPCODES[opcode_index] for opcode_index in rng.permutation(len(OPCODES))]
+    before = rng.integers(0, process_numpy.REGISTERS, (sample_count, process_numpy.REGISTERS))
+    opcode_numbers = rng.integers(0, len(OPCODES), sample_count)
+    a, b, c = rng.integers(0, process_numpy.REGISTERS, (3, sample_count))
+
+    after = before.copy()
+    rows = np.arange(sample_count)
+    results = process_numpy.opcode_results(before, a, b)
+    for opcode_number, opcode in enumerate(opcodes):
+        values, _ = results[opcode]
+        samples_with_opcode = opcode_numbers == opcode_number
+        after[rows[samples_with_opcode], c[samples_with_opcode]] = values[samples_with_opcode]
+
+    samples = np.column_stack([before, opcode_numbers, a, b, c, after])
+    return samples, opcodes
+
+
+def to_samples(samples):
+    return [
+        process.Sample(row[:4], process.Instructions(*row[4:8]), row[8:])
+        for row in samples.tolist()
+    ]
+
+
+def benchmark(engine, samples):
+    if engine == 'process':
+        samples = to_samples(samples)
+    start = time.perf_counter()
+    total = ENGINES[engine](samples).calculate_opcodes(skip_opcode_resolution=True)
+    seconds = time.perf_counter() - start
+    return BenchmarkResult(engine, len(samples), total, seconds)
+
+
+def main():
+    for sample_count in SAMPLE_COUNTS:
+        samples, _ = generate_samples(sample_count)
+        for engine in ENGINES:
+            if engine == 'process' and sample_count > MAX_PROCESS_SAMPLES:
+                continue
+            result = benchmark(engine, samples)
+            print(
+                f'{result.engine:>13}: {result.samples} samples, {result.total} behave like 3 or more opcodes, '
+                f'{result.seconds:.3f} seconds, {result.samples_per_second:,.0f} samples per second'
+            )
+
+
+if __name__ == '__main__':
+    main()
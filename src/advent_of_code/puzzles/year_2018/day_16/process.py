@@ -6,6 +6,26 @@ import operator
 import timeit
 
 
+OPCODES = (
+    '_addr',
+    '_addi',
+    '_mulr',
+    '_muli',
+    '_banr',
+    '_bani',
+    '_borr',
+    '_bori',
+    '_setr',
+    '_seti',
+    '_gtir',
+    '_gtri',
+    '_gtrr',
+    '_eqir',
+    '_eqri',
+    '_eqrr',
+)
+
+
 @dataclasses.dataclass(frozen=True)
 class Instructions:
     opcode: int
@@ -61,20 +81,28 @@ class DeviceVM:
         return cls(samples, test_program)
 
     def calculate_opcodes(self, skip_opcode_resolution=False):
+        total, unresolved_opcodes = self.possible_opcodes()
+        if not skip_opcode_resolution:
+            self.opcodes = self._resolve_opcode_results(unresolved_opcodes)
+        return total
+
+    def possible_opcodes(self):
+        """
+        Return the number of samples that behave like 3 or more opcodes, and the opcodes each opcode number could be.
+        """
         total = 0
         unresolved_opcodes = collections.defaultdict(set)
+        opcode_fns = self.OPCODE_FNS
         for sample in self.samples:
             possible_opcodes = set()
-            for opcode, opcode_fn in self.OPCODE_FNS.items():
+            for opcode, opcode_fn in opcode_fns.items():
                 exp = opcode_fn(sample.before, sample.instructions.a, sample.instructions.b, sample.instructions.c)
                 if sample.after == exp:
                     possible_opcodes.add(opcode)
             if len(possible_opcodes) >= 3:
                 total += 1
             unresolved_opcodes[sample.instructions.opcode] |= possible_opcodes
-        if not skip_opcode_resolution:
-            self.opcodes = self._resolve_opcode_results(unresolved_opcodes)
-        return total
+        return total, unresolved_opcodes
 
     @staticmethod
     def _resolve_opcode_results(unresolved_opcodes):
@@ -162,25 +190,7 @@ class DeviceVM:
 
     @property
     def OPCODE_FNS(self):
-        opcodes = [
-            '_addr',
-            '_addi',
-            '_mulr',
-            '_muli',
-            '_banr',
-            '_bani',
-            '_borr',
-            '_bori',
-            '_setr',
-            '_seti',
-            '_gtir',
-            '_gtri',
-            '_gtrr',
-            '_eqir',
-            '_eqri',
-            '_eqrr',
-        ]
-        return {opcode: getattr(self, opcode) for opcode in opcodes}
+        return {opcode: getattr(self, opcode) for opcode in OPCODES}
 
 
 def main():
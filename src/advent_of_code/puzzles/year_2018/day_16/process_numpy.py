@@ -0,0 +1,169 @@
+import re
+import timeit
+
+import numpy as np
+
+from advent_of_code.puzzles.year_2018.day_16 import process
+from advent_of_code.puzzles.year_2018.day_16.process import OPCODES
+
+
+REGISTERS = 4
+# before registers, then opcode, a, b, c, then after registers
+SAMPLE_WIDTH = 3 * REGISTERS
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# how each opcode reads a and b: as a register, as a value, or not at all
+OPERAND_MODES = {
+    '_addr': ('r', 'r'),
+    '_addi': ('r', 'i'),
+    '_mulr': ('r', 'r'),
+    '_muli': ('r', 'i'),
+    '_banr': ('r', 'r'),
+    '_bani': ('r', 'i'),
+    '_borr': ('r', 'r'),
+    '_bori': ('r', 'i'),
+    '_setr': ('r', None),
+    '_seti': ('i', None),
+    '_gtir': ('i', 'r'),
+    '_gtri': ('r', 'i'),
+    '_gtrr': ('r', 'r'),
+    '_eqir': ('i', 'r'),
+    '_eqri': ('r', 'i'),
+    '_eqrr': ('r', 'r'),
+}
+
+OPERATIONS = {
+    '_addr': np.add,
+    '_addi': np.add,
+    '_mulr': np.multiply,
+    '_muli': np.multiply,
+    '_banr': np.bitwise_and,
+    '_bani': np.bitwise_and,
+    '_borr': np.bitwise_or,
+    '_bori': np.bitwise_or,
+    '_setr': lambda a, b: a,
+    '_seti': lambda a, b: a,
+    '_gtir': np.greater,
+    '_gtri': np.greater,
+    '_gtrr': np.greater,
+    '_eqir': np.equal,
+    '_eqri': np.equal,
+    '_eqrr': np.equal,
+}
+
+
+def sample_array(samples):
+    # one row of SAMPLE_WIDTH ints per sample
+    return np.array(
+        [
+            [*sample.before, sample.instructions.opcode, sample.instructions.a, sample.instructions.b,
+             sample.instructions.c, *sample.after]
+            for sample in samples
+        ],
+        dtype=np.int64,
+    ).reshape(-1, SAMPLE_WIDTH)
+
+
+def opcode_results(before, a, b):
+    """
+    Return the value each opcode writes for every sample, as opcode -> (values, samples it can run on).
+
+    An opcode cannot run on a sample that asks it to read a register that does not exist.
+    """
+    rows = np.arange(len(before))
+    operands = {
+        'r': (before[rows, a % REGISTERS], (a >= 0) & (a < REGISTERS)),
+        'i': (a, True),
+    }
+    operands_b = {
+        'r': (before[rows, b % REGISTERS], (b >= 0) & (b < REGISTERS)),
+        'i': (b, True),
+        None: (b, True),
+    }
+    results = {}
+    for opcode in OPCODES:
+        a_mode, b_mode = OPERAND_MODES[opcode]
+        a_values, a_valid = operands[a_mode]
+        b_values, b_valid = operands_b[b_mode]
+        results[opcode] = OPERATIONS[opcode](a_values, b_values), a_valid & b_valid
+    return results
+
+
+def candidate_matrix(samples):
+    """
+    Return a bool matrix indexed [sample, opcode index in OPCODES] of whether each sample behaves like each opcode.
+
+    A sample behaves like an opcode if register c exists, the opcode writes the value register c holds after, and
+    every other register is unchanged.
+    """
+    before = samples[:, :REGISTERS]
+    a, b, c = samples[:, REGISTERS + 1], samples[:, REGISTERS + 2], samples[:, REGISTERS + 3]
+    after = samples[:, 2 * REGISTERS:]
+    rows = np.arange(len(samples))
+
+    c_register = c % REGISTERS
+    unchanged = before == after
+    writable = (c >= 0) & (c < REGISTERS) & (unchanged.sum(axis=1) - unchanged[rows, c_register] == REGISTERS - 1)
+    expected = after[rows, c_register]
+
+    matrix = np.empty((len(samples), len(OPCODES)), dtype=bool)
+    for opcode_index, (values, valid) in enumerate(opcode_results(before, a, b).values()):
+        matrix[:, opcode_index] = (values == expected) & writable & valid
+    return matrix
+
+
+class DeviceVM(process.DeviceVM):
+    """
+    Opcode inference over all samples at once, with the samples held as rows of a single int array.
+
+    Each opcode is evaluated once per chunk of samples as array operations into a samples x 16 candidate matrix. The
+    part 1 count and each opcode number's candidates are reductions over that matrix.
+    """
+
+    def __init__(self, samples, test_program=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        if not isinstance(samples, np.ndarray):
+            samples = sample_array(samples)
+        super().__init__(samples, test_program)
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def read_file(cls):
+        with open('input.txt') as f:
+            input_ = f.read().strip()
+        raw_samples, raw_test_program = input_.split('\n\n\n\n')
+        samples = np.array(re.findall(r'\d+', raw_samples), dtype=np.int64).reshape(-1, SAMPLE_WIDTH)
+        test_program = [
+            process.Instructions(*[int(num) for num in raw_instrs.split()])
+            for raw_instrs in raw_test_program.split('\n')
+        ]
+        return cls(samples, test_program)
+
+    def possible_opcodes(self):
+        total = 0
+        opcode_numbers = np.unique(self.samples[:, REGISTERS])
+        # indexed [position of opcode number in opcode_numbers, opcode index in OPCODES]
+        seen = np.zeros((len(opcode_numbers), len(OPCODES)), dtype=bool)
+        for start in range(0, len(self.samples), self.chunk_size):
+            chunk = self.samples[start:start + self.chunk_size]
+            matrix = candidate_matrix(chunk)
+            total += int(np.count_nonzero(matrix.sum(axis=1) >= 3))
+            number_indexes = np.searchsorted(opcode_numbers, chunk[:, REGISTERS])
+            for opcode_index in range(len(OPCODES)):
+                seen[:, opcode_index] |= np.bincount(
+                    number_indexes, weights=matrix[:, opcode_index], minlength=len(opcode_numbers)
+                ) > 0
+        unresolved_opcodes = {
+            int(number): {OPCODES[opcode_index] for opcode_index in np.flatnonzero(seen[number_index])}
+            for number_index, number in enumerate(opcode_numbers)
+        }
+        return total, unresolved_opcodes
+
+
+def main():
+    dvm = DeviceVM.read_file()
+    print(f'Number of samples that behave like 3 or more opcodes: {dvm.calculate_opcodes()}')
+    print(f'Register 0 value after executing test program: {dvm.run_program()[0]}')
+
+
+if __name__ == '__main__':
+    print(f"Completed in {timeit.timeit(main, number=1)} seconds")
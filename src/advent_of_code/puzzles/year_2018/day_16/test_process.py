@@ -1,9 +1,26 @@
+import pytest
+
+from advent_of_code.puzzles.year_2018.day_16 import benchmark
 from advent_of_code.puzzles.year_2018.day_16 import process
+from advent_of_code.puzzles.year_2018.day_16 import process_numpy
+
+
+ENGINES = [process.DeviceVM, process_numpy.DeviceVM]
 
 
-def test_example():
-    dvm = process.DeviceVM(
+@pytest.mark.parametrize('device_vm_cls', ENGINES)
+def test_example(device_vm_cls):
+    dvm = device_vm_cls(
         [process.Sample([3, 2, 1, 1], process.Instructions(*[9, 2, 1, 2]), [3, 2, 2, 1])],
     )
 
     assert dvm.calculate_opcodes(skip_opcode_resolution=True) == 1
+
+
+@pytest.mark.parametrize('chunk_size', [7, process_numpy.DEFAULT_CHUNK_SIZE])
+def test_numpy_matches_process(chunk_size):
+    samples, _ = benchmark.generate_samples(2_000, seed=1)
+    dvm = process.DeviceVM(benchmark.to_samples(samples))
+    numpy_dvm = process_numpy.DeviceVM(samples, chunk_size=chunk_size)
+
+    assert numpy_dvm.possible_opcodes() == dvm.possible_opcodes()